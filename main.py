@@ -7,10 +7,8 @@ Suporta: Debian (.deb), Arch (.pkg.tar.xz), Fedora (.rpm), Alpine (.apk)
 
 import sys
 import os
-import argparse
-
-# 👉 Redirecionar stderr para suprimir Gtk-WARNINGs
-sys.stderr = open(os.devnull, 'w')
+import threading
+from functools import lru_cache
 
 # Suprimir warnings Python
 import warnings
@@ -23,102 +21,246 @@ logging.getLogger('gi').setLevel(logging.ERROR)
 # Suprimir mensagens de debug do GLib/GTK
 os.environ['G_MESSAGES_DEBUG'] = 'none'
 
-# GTK
-import gi
-gi.require_version('Gtk', '4.0')
-gi.require_version('Adw', '1')
-
-from gi.repository import Gtk, Adw, GLib, Gio
-from src.installer_window import InstallerWindow
-from src.package_detector import PackageDetector
-from src.settings_window import SettingsWindow
 from src.translator import get_translator
 
-class PackageInstallerApp(Adw.Application):
-    def __init__(self, language=None):
-        super().__init__(
-            application_id='com.installium.app',
-            flags=Gio.ApplicationFlags.HANDLES_OPEN
-        )
-        self.connect('activate', self.on_activate)
-        self.connect('open', self.on_open)
-        self.package_file = None
-        self.language = language
+# Idiomas aceitos por --lang
+_LANGUAGES = ('en', 'pt', 'ru', 'zh')
+
+# Opções legadas de idioma, traduzidas para --lang antes do argparse
+_LEGACY_LANG_FLAGS = {f'--{code}': ('--lang', code) for code in _LANGUAGES}
+
+# Opções de idioma tratadas pelo próprio aplicativo (não repassadas ao GTK)
+_LANG_FLAGS = frozenset(_LEGACY_LANG_FLAGS)
+
+# Mensagens de log pré-formatadas
+_MSG_OPEN_FILE = "Opening file: %s\n"
+_MSG_NOT_FOUND = "Warning: %s not found\n"
+_MSG_UNSUPPORTED = "Warning: %s is not a supported package type\n"
+
+@lru_cache(maxsize=128)
+def _detect_cached(path, mtime_ns):
+    """Detecta o tipo do pacote; a chave inclui o mtime para invalidar entradas antigas"""
+    from src.package_detector import detect_package_type as detect_by_name
+    return detect_by_name(path)
+
+def _resolve(path):
+    """Resolve um caminho com um único stat; retorna (caminho_absoluto, stat) ou None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st
+
+def _detect_resolved(resolved):
+    """Detecta o tipo de um caminho já resolvido por _resolve()"""
+    path, st = resolved
+    return _detect_cached(path, st.st_mtime_ns)
+
+def detect_package_type(path):
+    """Detecta o tipo de um pacote reutilizando resultados anteriores"""
+    resolved = _resolve(path)
+    if resolved is None:
+        return None
+    return _detect_resolved(resolved)
+
+def _install_log_filter():
+    """Descarta avisos do GLib/GTK (Gtk-WARNING etc.) sem redirecionar o stderr do processo"""
+    from gi.repository import GLib
+    shown = GLib.LogLevelFlags.LEVEL_ERROR | GLib.LogLevelFlags.LEVEL_CRITICAL
+    
+    def writer(log_level, fields, *user_data):
+        # Erros e críticos seguem para o writer padrão; tracebacks do Python não passam por aqui
+        if log_level & shown:
+            return GLib.log_writer_default(log_level, fields, None)
+        return GLib.LogWriterOutput.HANDLED
+    
+    GLib.log_set_writer_func(writer, None)
+
+def _package_path(value):
+    """
+    Valida o arquivo de pacote escolhido na linha de comando
+    
+    Só um token com extensão de pacote é tratado como o arquivo a abrir; os demais
+    (ex.: valores de opções do GTK/GApplication como em "--display :0") são repassados.
+    
+    Returns:
+        tuple: (caminho_absoluto ou None, token a repassar ao GTK ou None)
+    """
+    from src.package_detector import detect_package_type as detect_by_name
+    if not detect_by_name(value):
+        return None, value
+    resolved = _resolve(value)
+    if resolved is None:
+        _get_parser().error(f"File not found: {value}")
+    return resolved[0], None
+
+def _build_app_class():
+    """Importa o GTK/libadwaita e define a aplicação apenas quando a GUI é necessária"""
+    # GTK
+    import gi
+    gi.require_version('Gtk', '4.0')
+    gi.require_version('Adw', '1')
+
+    from gi.repository import Adw, Gio, GLib
+    from src.installer_window import InstallerWindow
+
+    class PackageInstallerApp(Adw.Application):
+        _APP_ID = 'com.installium.app'
+        _FLAGS = Gio.ApplicationFlags.HANDLES_OPEN | Gio.ApplicationFlags.HANDLES_COMMAND_LINE
+    
+        def __init__(self, language=None):
+            super().__init__(application_id=self._APP_ID, flags=self._FLAGS)
+            self.language = language
+            # Janela principal, reutilizada em ativações/aberturas seguintes
+            self._win = None
         
-    def on_activate(self, app):
-        # Processar argumentos não relacionados ao idioma
-        remaining_args = []
-        for arg in sys.argv[1:]:
-            if not arg.startswith('--') or arg in ['--en', '--pt', '--ru', '--zh']:
-                continue
-            remaining_args.append(arg)
+        def _get_window(self):
+            """
+            Obtém a janela principal, criando-a apenas na primeira vez
+            
+            Uma janela já existente é devolvida como está: arquivos chegam só por
+            do_open, e uma reativação simples não deve recarregar o pacote.
+            """
+            if self._win is None:
+                self._win = InstallerWindow(application=self)
+                self._win.connect('destroy', self._on_window_destroy)
+            return self._win
         
-        # Verificar se há arquivo de pacote nos argumentos restantes
-        for arg in remaining_args:
-            if os.path.exists(arg):
-                detector = PackageDetector()
-                package_type = detector.detect_package_type(arg)
-                if package_type:
-                    self.package_file = os.path.abspath(arg)
-                    print(f"Opening with package: {self.package_file}")
-                    break
-                else:
-                    print(f"Warning: {arg} is not a supported package type")
+        def _on_window_destroy(self, win):
+            self._win = None
+        
+        # Os sinais activate/open/command-line são tratados pelas funções virtuais do_*
+        def do_activate(self):
+            # Com HANDLES_COMMAND_LINE, arquivos passados chegam por do_command_line -> do_open
+            self._get_window().present()
+    
+        def do_command_line(self, cmdline):
+            # A linha de comando chega à instância primária, inclusive a de invocações
+            # secundárias encaminhadas via D-Bus (que encerram sem criar janela)
+            cwd = cmdline.get_cwd() or os.getcwd()
+            files = [
+                Gio.File.new_for_commandline_arg_and_cwd(arg, cwd)
+                for arg in cmdline.get_arguments()[1:]
+                if not arg.startswith('-')
+            ]
+            if files:
+                self.open(files, "")
             else:
-                print(f"Error: File not found: {arg}")
+                self.activate()
+            return 0
+    
+        def do_open(self, files, n_files, hint):
+            # Mostrar a janela imediatamente; a detecção (stat) roda fora do loop do GTK
+            win = self._get_window()
+            win.present()
         
-        win = InstallerWindow(application=app, package_file=self.package_file)
-        win.present()
-    
-    def on_open(self, app, files, n_files, hint):
-        if files and len(files) > 0:
-            file_path = files[0].get_path()
-            if file_path and os.path.exists(file_path):
-                detector = PackageDetector()
-                package_type = detector.detect_package_type(file_path)
-                if package_type:
-                    self.package_file = file_path
-                    print(f"Opening file: {file_path}")
+            # Processar todos os arquivos recebidos de uma vez (ex.: seleção múltipla no gerenciador de arquivos)
+            # Arquivos sem caminho local (ex.: URIs remotas) são reportados pela URI
+            paths = [files[i].get_path() or files[i].get_uri() for i in range(n_files)]
+            thread = threading.Thread(target=self._detect_worker, args=(win, paths))
+            thread.daemon = True
+            thread.start()
+    
+        def _detect_worker(self, win, paths):
+            """Worker thread para detecção dos pacotes abertos"""
+            valid = []
+            messages = []
+            for path in paths:
+                resolved = _resolve(path)
+                if resolved is None:
+                    messages.append(_MSG_NOT_FOUND % path)
+                elif _detect_resolved(resolved):
+                    valid.append(path)
                 else:
-                    print(f"Warning: {file_path} is not a supported package type")
-        
-        win = InstallerWindow(application=app, package_file=self.package_file)
-        win.present()
+                    messages.append(_MSG_UNSUPPORTED % path)
+            if valid:
+                # Só o primeiro pacote é aberto pela janela
+                messages.append(_MSG_OPEN_FILE % valid[0])
+            if messages:
+                sys.stdout.write("".join(messages))
+            GLib.idle_add(self._on_detect_done, win, valid)
+    
+        def _on_detect_done(self, win, valid):
+            """Entrega os pacotes válidos à janela (executado no loop principal)"""
+            if valid:
+                win.open_packages(valid)
+            return False
 
-def parse_arguments():
-    """Processa argumentos de linha de comando"""
+    return PackageInstallerApp
+
+# Parser de argumentos global (montado uma única vez)
+_parser = None
+
+def _build_parser():
+    """Monta o parser de argumentos de linha de comando"""
+    import argparse
     parser = argparse.ArgumentParser(
         description='Universal Package Installer',
         add_help=False  # Desabilitar help padrão para não conflitar com GTK
     )
     
-    # Argumentos de idioma
-    parser.add_argument('--en', action='store_const', const='en', dest='language',
-                       help='Set language to English')
-    parser.add_argument('--pt', action='store_const', const='pt', dest='language',
-                       help='Definir idioma para Português')
-    parser.add_argument('--ru', action='store_const', const='ru', dest='language',
-                       help='Установить язык на русский')
-    parser.add_argument('--zh', action='store_const', const='zh', dest='language',
-                       help='设置语言为中文')
+    # Argumento de idioma
+    parser.add_argument('--lang', choices=_LANGUAGES, dest='language',
+                       help='Set interface language')
     
     # Arquivo de pacote (opcional)
-    parser.add_argument('package_file', nargs='?', 
+    parser.add_argument('package_file', nargs='?',
                        help='Package file to open (.deb, .rpm, .pkg.tar.xz, .apk)')
     
     # Argumentos de ajuda
     parser.add_argument('-h', '--help', action='store_true',
                        help='Show this help message and exit')
     
-    return parser.parse_known_args()
+    return parser
 
-def show_help():
-    """Mostra ajuda personalizada"""
-    print("""Universal Package Installer
+def _get_parser():
+    """Obtém o parser global de argumentos"""
+    global _parser
+    if _parser is None:
+        _parser = _build_parser()
+    return _parser
+
+def parse_arguments(argv=None):
+    """Processa argumentos de linha de comando"""
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    # Converter --en/--pt/--ru/--zh em --lang <código>
+    translated = []
+    for arg in argv:
+        translated.extend(_LEGACY_LANG_FLAGS.get(arg, (arg,)))
+    
+    return _get_parser().parse_known_args(translated)
+
+def _gtk_arguments(argv, package_arg, package_file):
+    """
+    Monta os argumentos repassados ao GTK a partir da linha de comando original
+    
+    Args:
+        argv: Argumentos originais (sem o nome do programa)
+        package_arg: Token escolhido pelo argparse como arquivo de pacote
+        package_file: Caminho absoluto validado desse token (ou None se repassado)
+    """
+    gtk_args = ['installium']
+    args = iter(argv)
+    for arg in args:
+        if arg in _LANG_FLAGS or arg.startswith('--lang='):
+            continue
+        if arg == '--lang':
+            next(args, None)  # Descartar também o código do idioma
+            continue
+        if package_file and arg == package_arg:
+            arg = package_file
+        gtk_args.append(arg)
+    return gtk_args
+
+# Texto de ajuda pré-codificado, escrito com uma única chamada write()
+_HELP = """Universal Package Installer
 
 Usage: installium [OPTIONS] [PACKAGE_FILE]
 
 Language Options:
+  --lang CODE   Set language (en, pt, ru, zh)
   --en          Set language to English
   --pt          Definir idioma para Português  
   --ru          Установить язык на русский
@@ -132,11 +274,24 @@ Examples:
   installium --pt package.deb        # Open package.deb in Portuguese
   installium --ru package.rpm        # Open package.rpm in Russian
   installium package.pkg.tar.xz      # Open package with system language
-""")
+
+""".encode('utf-8')
+
+_HELP_FLAGS = ('-h', '--help')
+
+def show_help():
+    """Mostra ajuda personalizada"""
+    sys.stdout.buffer.write(_HELP)
+    sys.stdout.flush()
 
 def main():
+    # Atalho para a ajuda, antes mesmo de montar o argparse
+    if any(arg in _HELP_FLAGS for arg in sys.argv[1:]):
+        show_help()
+        return 0
+    
     # Processar argumentos
-    args, unknown = parse_arguments()
+    args, _unknown = parse_arguments()  # Repassados ao GTK por _gtk_arguments()
     
     # Mostrar ajuda se solicitado
     if args.help:
@@ -147,7 +302,8 @@ def main():
     language = args.language
     if not language:
         # Se não foi especificado via linha de comando, carregar configuração salva
-        language = SettingsWindow.load_language_setting()
+        from src.config import load_language_setting
+        language = load_language_setting()
     
     # Aplicar configuração de idioma antes de criar a janela
     translator = get_translator()
@@ -156,20 +312,21 @@ def main():
     elif language == 'auto':
         translator.detect_system_language()
     
-    # Criar aplicação
+    # Validar apenas o token escolhido como pacote
+    package_file = passthrough = None
+    if args.package_file:
+        package_file, passthrough = _package_path(args.package_file)
+    
+    # Criar aplicação (o GTK só é carregado a partir daqui)
+    PackageInstallerApp = _build_app_class()
+    # Suprimir avisos do GTK sem perder tracebacks do Python
+    _install_log_filter()
     app = PackageInstallerApp(language=language)
     
     # Preparar argumentos para GTK (remover argumentos de idioma)
-    gtk_args = ['installium']  # Nome do programa
-    
-    # Adicionar argumentos desconhecidos (provavelmente arquivos)
-    for arg in unknown:
-        if not arg.startswith('--') or arg not in ['--en', '--pt', '--ru', '--zh']:
-            gtk_args.append(arg)
-    
-    # Adicionar arquivo de pacote se especificado
-    if args.package_file:
-        gtk_args.append(args.package_file)
+    # Manter a ordem original da linha de comando: o pacote validado continua sendo o
+    # primeiro arquivo aberto e opções do GTK continuam junto de seus valores
+    gtk_args = _gtk_arguments(sys.argv[1:], args.package_file, package_file)
     
     return app.run(gtk_args)
 
@@ -0,0 +1,54 @@
+"""
+Configurações do usuário
+Leitura e gravação de ~/.config/installium/settings.conf (sem dependência do GTK)
+"""
+
+import os
+from pathlib import Path
+
+# Arquivo de configurações do usuário
+_CONFIG_PATH = os.path.expanduser("~/.config/installium/settings.conf")
+
+# Diretório de configuração já criado neste processo
+_config_dir_ready = False
+
+def load_setting(key, default=None):
+    """Carrega uma chave do arquivo de configurações"""
+    prefix = key + '='
+    try:
+        for line in Path(_CONFIG_PATH).read_text().splitlines():
+            if line.startswith(prefix):
+                return line[len(prefix):].strip()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading setting {key}: {e}")
+    
+    return default
+
+def load_language_setting():
+    """Carrega a configuração de idioma salva"""
+    return load_setting('language', 'auto')
+
+def save_setting(key, value):
+    """Grava uma chave no arquivo de configurações, preservando as demais"""
+    global _config_dir_ready
+    try:
+        if not _config_dir_ready:
+            os.makedirs(os.path.dirname(_CONFIG_PATH), exist_ok=True)
+            _config_dir_ready = True
+        
+        prefix = key + '='
+        try:
+            lines = [line for line in Path(_CONFIG_PATH).read_text().splitlines()
+                     if not line.startswith(prefix)]
+        except FileNotFoundError:
+            lines = []
+        lines.append(f"{key}={value}")
+        
+        # Gravar em um temporário e substituir: o arquivo nunca fica pela metade
+        tmp_path = _CONFIG_PATH + ".tmp"
+        Path(tmp_path).write_text("\n".join(lines) + "\n")
+        os.replace(tmp_path, _CONFIG_PATH)
+    except Exception as e:
+        print(f"Error saving setting {key}: {e}")
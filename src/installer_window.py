@@ -4,12 +4,177 @@ Interface GTK4 para instalação de pacotes
 """
 
 import os
-from pathlib import Path
+import re
+import threading
+from functools import lru_cache
 from gi.repository import Gtk, Adw, GLib, Gio, Gdk
 from .package_detector import PackageDetector
 from .package_installer import PackageInstaller
 from .translator import get_translator, _
 from .settings_window import SettingsWindow
+from .config import load_setting
+
+# Expressões regulares compiladas uma única vez
+_NUM_RE = re.compile(r'\d+')
+_NUMERIC_VERSION = re.compile(r'\d+(?:\.\d+)*')
+# Segmentos de versão no estilo rpm/dpkg: blocos numéricos, alfabéticos ou '~'
+_VER_SEGMENT = re.compile(r'~|\d+|[a-zA-Z]+')
+
+# Limites das unidades de tamanho
+_KB, _MB, _GB = 1024, 1 << 20, 1 << 30
+_SIZE_UNITS = ((_GB, 'GB'), (_MB, 'MB'), (_KB, 'KB'))
+
+# CSS da janela: divisórias como bordas (menos nós CSS que Gtk.Separator)
+# e sem sombras/transições
+_CSS = """
+.installium * {
+    box-shadow: none;
+    transition: none;
+}
+.installium .header-section {
+    border-bottom: 1px solid alpha(currentColor, 0.15);
+    padding-bottom: 20px;
+}
+.installium .button-row {
+    border-top: 1px solid alpha(currentColor, 0.15);
+    padding-top: 16px;
+}
+.installium .package-title {
+    font-weight: bold;
+}
+.installium .status-update {
+    color: #f6d32d;
+}
+.installium .status-downgrade {
+    color: #f66151;
+}
+.installium .status-ok {
+    color: #2ec27e;
+}
+.installium .status-missing {
+    color: #e01b24;
+}
+"""
+
+# Classes CSS do status de instalação (cores definidas em _CSS)
+_STATUS_UPDATE = "status-update"
+_STATUS_DOWNGRADE = "status-downgrade"
+_STATUS_INSTALLED = "status-ok"
+_STATUS_MISSING = "status-missing"
+
+# Ícones padrão por tipo de pacote
+_FALLBACK_ICONS = {
+    'debian': 'application-x-deb',
+    'arch': 'package-x-generic',
+    'fedora': 'application-x-rpm',
+    'alpine': 'package-x-generic'
+}
+
+# Marcador de "ainda não consultado" no cache de ícones (None significa sem ícone)
+_MISSING = object()
+
+# Intervalo entre pulsos da barra de progresso (microssegundos)
+_PULSE_INTERVAL_US = 100000
+
+# Provedor de CSS global
+_css_provider = None
+
+# Chaves de tradução dos rótulos de detalhes, na ordem das linhas do grid
+_DETAIL_LABEL_KEYS = (
+    "package_type",
+    "package_version",
+    "package_description",
+    "package_maintainer",
+    "package_size"
+)
+
+# Filtros do seletor de arquivos: (distribuição, chave de tradução, padrões)
+_FILE_FILTERS = (
+    ('debian', 'debian_packages', ('*.deb',)),
+    ('arch', 'arch_packages', ('*.pkg.tar.xz', '*.pkg.tar.zst')),
+    ('fedora', 'fedora_packages', ('*.rpm',)),
+    ('alpine', 'alpine_packages', ('*.apk',)),
+    (None, 'all_files', ('*',)),
+)
+
+def _compare_segments(version1: str, version2: str) -> int:
+    """
+    Compara duas strings de versão segmento a segmento, como rpmvercmp/dpkg:
+    números por valor, letras em ordem alfabética, número vence letra e '~' vem
+    antes de tudo (pré-lançamento). Ex.: 1.0 < 1.0a < 1.0b < 1.1, 1.0~rc1 < 1.0
+    """
+    segments1 = _VER_SEGMENT.findall(version1)
+    segments2 = _VER_SEGMENT.findall(version2)
+    for index in range(max(len(segments1), len(segments2))):
+        a = segments1[index] if index < len(segments1) else None
+        b = segments2[index] if index < len(segments2) else None
+        if a == b:
+            continue
+        if a == '~':
+            return -1
+        if b == '~':
+            return 1
+        if a is None:
+            return -1
+        if b is None:
+            return 1
+        if a.isdigit() and b.isdigit():
+            a, b = int(a), int(b)
+            if a != b:
+                return (a > b) - (a < b)
+        elif a.isdigit() != b.isdigit():
+            return 1 if a.isdigit() else -1
+        else:
+            return (a > b) - (a < b)
+    return 0
+
+def _split_version(version: str) -> tuple:
+    """Separa época, versão e revisão/release (formato [época:]versão[-release])"""
+    epoch, sep, rest = version.partition(':')
+    if not sep or not epoch.isdigit():
+        epoch, rest = '0', version
+    upstream, _sep, release = rest.rpartition('-')
+    if not _sep:
+        upstream, release = rest, ''
+    return int(epoch), upstream, release
+
+@lru_cache(maxsize=256)
+def _compare_versions_cached(version1: str, version2: str) -> int:
+    """
+    Compara duas versões de pacote (resultado memorizado por par de versões)
+    Retorna: 1 se version1 > version2, -1 se version1 < version2, 0 se iguais
+    """
+    # Caminho rápido: versões só com números e pontos
+    if _NUMERIC_VERSION.fullmatch(version1) and _NUMERIC_VERSION.fullmatch(version2):
+        v1_parts = tuple(int(part) for part in version1.split('.'))
+        v2_parts = tuple(int(part) for part in version2.split('.'))
+        
+        # Igualar o tamanho preenchendo com zeros
+        max_len = max(len(v1_parts), len(v2_parts))
+        v1_parts += (0,) * (max_len - len(v1_parts))
+        v2_parts += (0,) * (max_len - len(v2_parts))
+        return (v1_parts > v2_parts) - (v1_parts < v2_parts)
+    
+    # Demais formatos (dpkg/rpm/pacman/apk): época, depois versão, depois release
+    epoch1, upstream1, release1 = _split_version(version1)
+    epoch2, upstream2, release2 = _split_version(version2)
+    if epoch1 != epoch2:
+        return (epoch1 > epoch2) - (epoch1 < epoch2)
+    return _compare_segments(upstream1, upstream2) or _compare_segments(release1, release2)
+
+def _install_css():
+    """Registra o CSS da janela principal (uma vez por processo)"""
+    global _css_provider
+    if _css_provider is not None:
+        return
+    
+    _css_provider = Gtk.CssProvider()
+    _css_provider.load_from_data(_CSS, -1)
+    Gtk.StyleContext.add_provider_for_display(
+        Gdk.Display.get_default(),
+        _css_provider,
+        Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+    )
 
 class InstallerWindow(Adw.ApplicationWindow):
     """Janela principal do instalador de pacotes"""
@@ -25,48 +190,90 @@ class InstallerWindow(Adw.ApplicationWindow):
         self.set_default_size(600, 240)  # Largura reduzida
         self.set_size_request(600, 240)  # Tamanho mínimo
         self.set_resizable(False)  # Janela com tamanho fixo
-        self.set_deletable(True)
         
-        # Componentes
-        self.detector = PackageDetector()
-        self.installer = PackageInstaller()
+        # Componentes (criados sob demanda, fora do caminho de abertura da janela)
+        self._detector = None
+        self._installer = None
         self.package_info = None
         self.package_file_path = None
+        self._file_filters = None
+        self._last_language = None
+        self._load_serial = 0
+        self._icon_cache = {}
+        # Pacote aberto durante uma instalação, carregado quando ela terminar
+        self._deferred_package = None
+        
+        # Referências aos widgets de detalhes (preenchidas em _build_ui)
+        self.detail_values = []
+        self._detail_label_widgets = []
+        self._pulse_id = None
+        self._last_pulse_time = 0
         
         # Construir interface
         self._build_ui()
         
-        # Conectar sinal para ajustar tamanho após mostrar
-        self.connect('realize', self._on_window_realize)
-        
         # Se um arquivo foi passado, carregá-lo
         if package_file and os.path.exists(package_file):
             self._load_package(package_file)
     
-    def _on_window_realize(self, widget):
-        """Callback chamado quando a janela é realizada"""
-        # Aguardar um momento para a janela se ajustar
-        GLib.timeout_add(100, self._finalize_window_setup)
+    @property
+    def detector(self):
+        """Detector de pacotes, criado no primeiro uso"""
+        if self._detector is None:
+            self._detector = PackageDetector()
+        return self._detector
     
-    def _finalize_window_setup(self):
-        """Finaliza a configuração da janela"""
-        # Obter tamanho natural da janela
-        natural_size = self.get_default_size()
-        
-        # Ajustar para um tamanho adequado
-        width = max(600, natural_size[0])  # Largura mínima reduzida
-        height = max(240, natural_size[1])  # Ajustado para altura menor
-        
-        # Definir tamanho final
-        self.set_default_size(width, height)
+    @property
+    def installer(self):
+        """Instalador de pacotes, criado no primeiro uso"""
+        if self._installer is None:
+            # Backend PackageKit apenas por opção explícita nas configurações (installer_backend=packagekit)
+            use_packagekit = load_setting('installer_backend') == 'packagekit'
+            self._installer = PackageInstaller(use_packagekit=use_packagekit)
+        return self._installer
+    
+    def set_use_packagekit(self, enabled):
+        """Aplica a opção do backend PackageKit (alterada nas configurações)"""
+        if self._installer is not None:
+            self._installer.set_use_packagekit(enabled)
+    
+    def add_toast(self, toast):
+        """Exibe um toast na janela principal (usado também pela janela de configurações)"""
+        self.toast_overlay.add_toast(toast)
+    
+    def open_packages(self, package_files):
+        """
+        Abre pacotes recebidos pela aplicação: só o primeiro é carregado
         
-        # Desabilitar redimensionamento
-        self.set_resizable(False)
+        Args:
+            package_files: Lista de caminhos de pacotes já validados
+        """
+        # A janela mostra um pacote por vez; avisar que os demais foram ignorados
+        if len(package_files) > 1:
+            self.add_toast(Adw.Toast.new(_("extra_packages_ignored", count=len(package_files) - 1)))
         
-        return False  # Remove o timeout
+        # Os caminhos já passaram por stat na detecção; não repetir a verificação
+        if package_files[0] != self.package_file_path:
+            self._load_package_when_idle(package_files[0])
+    
+    def _load_package_when_idle(self, file_path):
+        """Carrega o pacote agora ou, com uma instalação em andamento, quando ela terminar"""
+        if self._installer is not None and self._installer.is_installing:
+            self._deferred_package = file_path
+            return
+        self._load_package(file_path)
+    
+    def _load_deferred_package(self):
+        """Carrega o pacote aberto durante a instalação, se houver"""
+        file_path, self._deferred_package = self._deferred_package, None
+        if file_path:
+            self._load_package(file_path)
     
     def _build_ui(self):
         """Constrói a interface do usuário"""
+        _install_css()
+        self.add_css_class("installium")
+        
         # Container principal
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         main_box.set_margin_top(20)
@@ -77,46 +284,42 @@ class InstallerWindow(Adw.ApplicationWindow):
         # Área de conteúdo principal
         content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         
-        # Header com ícone e título (alinhado à esquerda)
-        header_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
-        header_box.set_halign(Gtk.Align.START)
+        # Header com ícone e título (alinhado à esquerda): ícone na coluna 0, textos na coluna 1
+        header_grid = Gtk.Grid()
+        header_grid.set_column_spacing(12)
+        header_grid.set_row_spacing(6)
+        header_grid.set_halign(Gtk.Align.START)
         
         # Ícone do pacote
         self.package_icon = Gtk.Image()
         self.package_icon.set_from_icon_name("package-x-generic")
         self.package_icon.set_pixel_size(64)
         self.package_icon.set_valign(Gtk.Align.START)
-        header_box.append(self.package_icon)
+        header_grid.attach(self.package_icon, 0, 0, 1, 3)
         
         # Informações do pacote
-        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
-        info_box.set_valign(Gtk.Align.START)
-        
         self.package_name = Gtk.Label()
-        self.package_name.set_markup("<b>Nenhum pacote selecionado</b>")
+        self.package_name.set_text("Nenhum pacote selecionado")
+        self.package_name.add_css_class("package-title")
         self.package_name.set_halign(Gtk.Align.START)
-        info_box.append(self.package_name)
+        header_grid.attach(self.package_name, 1, 0, 1, 1)
         
         self.package_version = Gtk.Label()
         self.package_version.set_text("Clique em 'Selecionar Pacote' para começar")
         self.package_version.set_halign(Gtk.Align.START)
         self.package_version.add_css_class("dim-label")
-        info_box.append(self.package_version)
+        header_grid.attach(self.package_version, 1, 1, 1, 1)
         
         # Status de instalação
         self.install_status = Gtk.Label()
         self.install_status.set_halign(Gtk.Align.START)
         self.install_status.set_visible(False)
-        info_box.append(self.install_status)
-        
-        header_box.append(info_box)
-        content_box.append(header_box)
+        header_grid.attach(self.install_status, 1, 2, 1, 1)
         
-        # Separador
-        separator = Gtk.Separator()
-        separator.set_margin_top(10)
-        separator.set_margin_bottom(10)
-        content_box.append(separator)
+        # Linha divisória via CSS (border-bottom) em vez de um Gtk.Separator
+        header_grid.add_css_class("header-section")
+        header_grid.set_margin_bottom(10)
+        content_box.append(header_grid)
         
         # Área de detalhes (sempre visível)
         self.details_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
@@ -131,7 +334,6 @@ class InstallerWindow(Adw.ApplicationWindow):
         
         # Labels de informações
         labels = ["Tipo:", "Versão:", "Descrição:", "Mantenedor:", "Tamanho:"]
-        self.detail_values = []
         
         for i, label_text in enumerate(labels):
             label = Gtk.Label()
@@ -140,14 +342,17 @@ class InstallerWindow(Adw.ApplicationWindow):
             label.set_valign(Gtk.Align.START)
             label.add_css_class("dim-label")
             details_grid.attach(label, 0, i, 1, 1)
+            self._detail_label_widgets.append(label)
             
-            value = Gtk.Label()
+            # Gtk.Inscription (GTK >= 4.8) tem largura fixa em caracteres e não
+            # remede o texto com Pango a cada alocação, ao contrário de Gtk.Label
+            value = Gtk.Inscription(
+                min_chars=30,
+                nat_chars=50,
+                text_overflow=Gtk.InscriptionOverflow.ELLIPSIZE_END
+            )
             value.set_halign(Gtk.Align.START)
             value.set_valign(Gtk.Align.START)
-            value.set_selectable(False)
-            value.set_wrap(False)  # Desabilitar wrap para controlar truncamento
-            value.set_max_width_chars(50)
-            value.set_ellipsize(3)  # Pango.EllipsizeMode.END
             value.set_text("-")  # Valor inicial vazio
             details_grid.attach(value, 1, i, 1, 1)
             self.detail_values.append(value)
@@ -172,17 +377,11 @@ class InstallerWindow(Adw.ApplicationWindow):
         # Adicionar área de conteúdo ao container principal
         main_box.append(content_box)
         
-        # Separador final
-        final_separator = Gtk.Separator()
-        main_box.append(final_separator)
-        
-        # Botões de ação (fixos na parte inferior)
-        button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
-        button_box.set_margin_top(16)
-        
-        # Container para botão selecionar e fechar (à esquerda)
-        left_buttons_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
-        left_buttons_box.set_halign(Gtk.Align.START)
+        # Botões de ação (fixos na parte inferior): selecionar/configurações/fechar à esquerda, instalar à direita
+        # A linha divisória acima dos botões vem do CSS (border-top)
+        button_grid = Gtk.Grid()
+        button_grid.set_column_spacing(6)
+        button_grid.add_css_class("button-row")
         
         # Botão selecionar pacote com ícone de arquivo
         self.select_button = Gtk.Button()
@@ -190,41 +389,37 @@ class InstallerWindow(Adw.ApplicationWindow):
         self.select_button.set_tooltip_text("Selecionar Pacote")
         self.select_button.add_css_class("suggested-action")
         self.select_button.connect("clicked", self._on_select_package)
-        left_buttons_box.append(self.select_button)
+        button_grid.attach(self.select_button, 0, 0, 1, 1)
         
         # Botão configurações
         self.settings_button = Gtk.Button()
         self.settings_button.set_icon_name("preferences-system-symbolic")
         self.settings_button.set_tooltip_text(_("settings"))
         self.settings_button.connect("clicked", self._on_settings)
-        left_buttons_box.append(self.settings_button)
+        button_grid.attach(self.settings_button, 1, 0, 1, 1)
         
         # Botão fechar com ícone X
         self.close_button = Gtk.Button()
         self.close_button.set_icon_name("window-close-symbolic")
         self.close_button.set_tooltip_text(_("close"))
         self.close_button.connect("clicked", self._on_close_app)
-        left_buttons_box.append(self.close_button)
-        
-        button_box.append(left_buttons_box)
-        
-        # Espaçador para empurrar o botão instalar para a direita
-        spacer = Gtk.Box()
-        spacer.set_hexpand(True)
-        button_box.append(spacer)
+        button_grid.attach(self.close_button, 2, 0, 1, 1)
         
-        # Botão instalar (à direita)
+        # Botão instalar (à direita, ocupando o espaço restante)
         self.install_button = Gtk.Button()
         self.install_button.set_label("Instalar")
         self.install_button.set_sensitive(False)
         self.install_button.connect("clicked", self._on_install_package)
+        self.install_button.set_hexpand(True)
         self.install_button.set_halign(Gtk.Align.END)
-        button_box.append(self.install_button)
+        button_grid.attach(self.install_button, 3, 0, 1, 1)
         
-        main_box.append(button_box)
+        main_box.append(button_grid)
         
-        # Adicionar ao window
-        self.set_content(main_box)
+        # Adicionar ao window (dentro de um overlay para exibir toasts)
+        self.toast_overlay = Adw.ToastOverlay()
+        self.toast_overlay.set_child(main_box)
+        self.set_content(self.toast_overlay)
         
         # Aplicar traduções iniciais
         self._update_translations()
@@ -232,43 +427,43 @@ class InstallerWindow(Adw.ApplicationWindow):
         
     def _update_translations(self):
         """Atualiza todos os textos da interface com as traduções"""
+        # Nada a fazer se o idioma não mudou desde a última atualização
+        language = self.translator.current_language
+        if language == self._last_language:
+            return
+        self._last_language = language
+        
+        tr = self.translator.get
+        
         # Título da janela
-        self.set_title(_("app_title"))
+        self.set_title(tr("app_title"))
         
         # Atualizar tooltips dos botões
-        self.select_button.set_tooltip_text(_("select_package") if not self.package_info else _("select_another_package"))
-        self.settings_button.set_tooltip_text(_("settings"))
-        self.close_button.set_tooltip_text(_("close"))
+        self.select_button.set_tooltip_text(tr("select_package") if not self.package_info else tr("select_another_package"))
+        self.settings_button.set_tooltip_text(tr("settings"))
+        self.close_button.set_tooltip_text(tr("close"))
         
         # Textos iniciais
         if not self.package_info:
-            self.package_name.set_markup(f"<b>{_('no_package_selected')}</b>")
-            self.package_version.set_text(_("click_to_start"))
-            self.install_button.set_label(_("install"))
+            self.package_name.set_text(tr("no_package_selected"))
+            self.package_version.set_text(tr("click_to_start"))
+            self.install_button.set_label(tr("install"))
         else:
             # Se há pacote carregado, atualizar display
             self._update_package_display()
             self._check_installation_status()
         
-        # Labels dos detalhes
-        detail_labels = [
-            _("package_type"),
-            _("package_version"), 
-            _("package_description"),
-            _("package_maintainer"),
-            _("package_size")
-        ]
-        
-        # Atualizar labels se o grid já foi criado
-        if hasattr(self, 'details_box') and self.details_box.get_first_child():
-            grid = self.details_box.get_first_child()
-            for i, label_text in enumerate(detail_labels):
-                label_widget = grid.get_child_at(0, i)
-                if label_widget:
-                    label_widget.set_text(label_text)
+        # Labels dos detalhes (atualizados pelas referências guardadas em _build_ui)
+        for label_widget, key in zip(self._detail_label_widgets, _DETAIL_LABEL_KEYS):
+            label_widget.set_text(tr(key))
         
         # Texto da barra de progresso
-        self.progress_label.set_text(_("preparing_installation"))
+        self.progress_label.set_text(tr("preparing_installation"))
+        
+        # Renomear filtros do seletor de arquivos já criados
+        if self._file_filters:
+            for key, file_filter in self._file_filters[0]:
+                file_filter.set_name(tr(key))
     
     def set_language(self, language_code: str):
         """
@@ -286,89 +481,108 @@ class InstallerWindow(Adw.ApplicationWindow):
     
     def _on_select_package(self, button):
         """Callback para seleção de pacote"""
-        dialog = Gtk.FileChooserDialog(
-            title=_("select_package"),
-            transient_for=self,
-            action=Gtk.FileChooserAction.OPEN
-        )
+        tr = self.translator.get
+        dialog = Gtk.FileDialog.new()
+        dialog.set_title(tr("select_package"))
+        dialog.set_accept_label(tr("open"))
+        dialog.set_modal(True)
         
-        dialog.add_button(_("cancel"), Gtk.ResponseType.CANCEL)
-        dialog.add_button(_("open"), Gtk.ResponseType.ACCEPT)
-        
-        # Filtros de arquivo baseados na distribuição
-        distro = self.detector.distro
-        
-        # Mapear distribuição para filtros
-        distro_filters = {
-            'debian': (_("debian_packages"), "*.deb"),
-            'arch': (_("arch_packages"), "*.pkg.tar.xz;*.pkg.tar.zst"),
-            'fedora': (_("fedora_packages"), "*.rpm"),
-            'alpine': (_("alpine_packages"), "*.apk")
-        }
-        
-        # Criar lista de filtros com o da distribuição atual primeiro
-        filters = []
-        default_filter = None
-        
-        # Adicionar filtro da distribuição atual primeiro (se conhecido)
-        if distro in distro_filters:
-            name, pattern = distro_filters[distro]
-            file_filter = Gtk.FileFilter()
-            file_filter.set_name(name)
-            for p in pattern.split(';'):
-                file_filter.add_pattern(p)
-            filters.append(file_filter)
-            default_filter = file_filter
-        
-        # Adicionar outros filtros
-        all_filters = [
-            (_("debian_packages"), "*.deb"),
-            (_("arch_packages"), "*.pkg.tar.xz;*.pkg.tar.zst"),
-            (_("fedora_packages"), "*.rpm"),
-            (_("alpine_packages"), "*.apk"),
-            (_("all_files"), "*")
-        ]
+        # Filtros de arquivo (montados uma única vez)
+        filters, default_filter = self._get_file_filters()
         
-        for name, pattern in all_filters:
-            # Pular se já foi adicionado como padrão
-            if distro in distro_filters and distro_filters[distro] == (name, pattern):
-                continue
-                
-            file_filter = Gtk.FileFilter()
-            file_filter.set_name(name)
-            for p in pattern.split(';'):
-                file_filter.add_pattern(p)
-            filters.append(file_filter)
-        
-        # Adicionar todos os filtros ao diálogo
-        for file_filter in filters:
-            dialog.add_filter(file_filter)
+        filter_store = Gio.ListStore.new(Gtk.FileFilter)
+        for _key, file_filter in filters:
+            filter_store.append(file_filter)
+        dialog.set_filters(filter_store)
         
         # Definir filtro padrão se disponível
         if default_filter:
-            dialog.set_filter(default_filter)
+            dialog.set_default_filter(default_filter)
         
-        dialog.connect("response", self._on_file_dialog_response)
-        dialog.present()
+        dialog.open(self, None, self._on_file_dialog_open_finish)
     
-    def _on_file_dialog_response(self, dialog, response):
-        """Callback para resposta do diálogo de arquivo"""
-        if response == Gtk.ResponseType.ACCEPT:
-            file_path = dialog.get_file().get_path()
-            self._load_package(file_path)
+    def _get_file_filters(self):
+        """
+        Obtém os filtros do seletor de arquivos, criando-os na primeira chamada
         
-        dialog.destroy()
+        Returns:
+            tuple: (lista de (chave_tradução, Gtk.FileFilter), filtro padrão ou None)
+        """
+        if self._file_filters is None:
+            tr = self.translator.get
+            distro = self.detector.distro
+            filters = []
+            default_filter = None
+            
+            for filter_distro, key, patterns in _FILE_FILTERS:
+                file_filter = Gtk.FileFilter()
+                file_filter.set_name(tr(key))
+                for pattern in patterns:
+                    file_filter.add_pattern(pattern)
+                
+                # Filtro da distribuição atual vai primeiro e é o padrão
+                if filter_distro == distro:
+                    filters.insert(0, (key, file_filter))
+                    default_filter = file_filter
+                else:
+                    filters.append((key, file_filter))
+            
+            self._file_filters = (filters, default_filter)
+        
+        return self._file_filters
+    
+    def _on_file_dialog_open_finish(self, dialog, result):
+        """Callback para conclusão do diálogo de arquivo"""
+        try:
+            file = dialog.open_finish(result)
+        except GLib.Error:
+            # Diálogo cancelado ou fechado
+            return
+        
+        if file:
+            self._load_package(file.get_path())
     
     def _load_package(self, file_path):
-        """Carrega informações do pacote"""
+        """Carrega informações do pacote (extração em thread separada)"""
         self.package_file_path = file_path
         
-        # Extrair informações do pacote
-        self.package_info = self.detector.extract_package_info(file_path)
+        # Identificar esta carga para descartar resultados de cargas anteriores
+        self._load_serial += 1
+        
+        # Mostrar progresso enquanto as informações são extraídas
+        self.progress_label.set_text(_("loading_package"))
+        self._show_progress(True)
+        self.install_button.set_sensitive(False)
+        
+        # Extrair informações fora do loop principal (dpkg/rpm/tar podem demorar)
+        thread = threading.Thread(
+            target=self._load_worker,
+            args=(self._load_serial, file_path)
+        )
+        thread.daemon = True
+        thread.start()
+    
+    def _load_worker(self, serial, file_path):
+        """Worker thread para extração de informações do pacote"""
+        try:
+            info = self.detector.extract_package_info(file_path)
+        except Exception as e:
+            # Garantir o retorno ao loop principal (senão a janela fica presa carregando)
+            info = {'error': _('error_extracting_info', error=str(e))}
+        GLib.idle_add(self._on_package_loaded, serial, info)
+    
+    def _on_package_loaded(self, serial, info):
+        """Callback (no loop principal) com as informações extraídas do pacote"""
+        if serial != self._load_serial:
+            return False  # Outro pacote foi selecionado nesse meio tempo
+        
+        self.package_info = info
+        self._show_progress(False)
+        self.progress_label.set_text(_("preparing_installation"))
         
         if 'error' in self.package_info:
             self._show_error(self.package_info['error'])
-            return
+            return False
         
         # Atualizar interface
         self._update_package_display()
@@ -382,6 +596,8 @@ class InstallerWindow(Adw.ApplicationWindow):
             self._show_warning(
                 _("incompatible_package", type=package_type, distro=self.detector.distro)
             )
+        
+        return False
     
     def _check_installation_status(self):
         """Verifica se o pacote já está instalado e compara versões"""
@@ -390,84 +606,75 @@ class InstallerWindow(Adw.ApplicationWindow):
         package_version = self.package_info.get('version')
         
         if package_name and package_name != 'Desconhecido':
-            is_installed, status_msg = self.detector.is_package_installed(package_name, package_type)
+            # Estado e versão instalada vêm de uma única consulta ao sistema
+            is_installed, status_msg, installed_version, _icon = self.detector.get_package_status(package_name, package_type)
             
             if is_installed:
-                # Obter versão instalada
-                installed_version = self.detector.get_installed_version(package_name, package_type)
-                
                 if installed_version and package_version:
                     version_comparison = self._compare_versions(package_version, installed_version)
                     
                     if version_comparison > 0:
                         # Versão do pacote é maior - mostrar "Atualizar"
-                        self.install_status.set_markup(f"<span color='#f6d32d'>{_('newer_version_available', version=installed_version)}</span>")
+                        self._set_status(_STATUS_UPDATE, _('newer_version_available', version=installed_version))
                         self.install_status.set_visible(True)
                         self.install_button.set_label(_("update"))
                         self.install_button.add_css_class("suggested-action")
                         self.install_button.remove_css_class("destructive-action")
                     elif version_comparison < 0:
                         # Versão instalada é maior - mostrar "Downgrade"
-                        self.install_status.set_markup(f"<span color='#f66151'>{_('older_version', version=installed_version)}</span>")
+                        self._set_status(_STATUS_DOWNGRADE, _('older_version', version=installed_version))
                         self.install_status.set_visible(True)
                         self.install_button.set_label(_("downgrade"))
                         self.install_button.add_css_class("destructive-action")
                         self.install_button.remove_css_class("suggested-action")
                     else:
                         # Mesma versão - mostrar "Reinstalar"
-                        self.install_status.set_markup(f"<span color='#2ec27e'>{_('package_installed', message=status_msg)}</span>")
+                        self._set_status(_STATUS_INSTALLED, _('package_installed', message=status_msg))
                         self.install_status.set_visible(True)
                         self.install_button.set_label(_("reinstall"))
                         self.install_button.add_css_class("destructive-action")
                         self.install_button.remove_css_class("suggested-action")
                 else:
                     # Não foi possível comparar versões - usar comportamento padrão
-                    self.install_status.set_markup(f"<span color='#2ec27e'>{_('package_installed', message=status_msg)}</span>")
+                    self._set_status(_STATUS_INSTALLED, _('package_installed', message=status_msg))
                     self.install_status.set_visible(True)
                     self.install_button.set_label(_("reinstall"))
                     self.install_button.add_css_class("destructive-action")
                     self.install_button.remove_css_class("suggested-action")
             else:
-                self.install_status.set_markup(f"<span color='#e01b24'>{_('package_not_installed', message=status_msg)}</span>")
+                self._set_status(_STATUS_MISSING, _('package_not_installed', message=status_msg))
                 self.install_status.set_visible(True)
                 self.install_button.set_label(_("install"))
                 self.install_button.add_css_class("suggested-action")
                 self.install_button.remove_css_class("destructive-action")
     
+    def _set_status(self, css_class, message):
+        """Define o texto do status de instalação e a classe CSS que dá a sua cor"""
+        self.install_status.set_css_classes([css_class])
+        self.install_status.set_text(message)
+    
     def _update_package_display(self):
         """Atualiza a exibição das informações do pacote"""
         info = self.package_info
         package_name = info.get('name', 'Desconhecido')
         package_type = info.get('type')
         
-        # Tentar obter ícone do pacote instalado primeiro
-        package_icon = None
-        if package_name != 'Desconhecido':
-            package_icon = self.detector.get_package_icon(package_name, package_type)
+        # Ícone resolvido uma vez por pacote (evita consultar o disco a cada troca de idioma)
+        key = (package_name, package_type)
+        gicon = self._icon_cache.get(key, _MISSING)
+        if gicon is _MISSING:
+            gicon = self._resolve_package_icon(package_name, package_type)
+            self._icon_cache[key] = gicon
         
         # Atualizar ícone
-        if package_icon:
-            # Se encontrou ícone específico do pacote
-            if package_icon.startswith('/'):
-                # É um caminho de arquivo
-                try:
-                    self.package_icon.set_from_file(package_icon)
-                except:
-                    # Se falhar, usar fallback
-                    self._set_fallback_icon(package_type)
-            else:
-                # É um nome de ícone do tema
-                try:
-                    self.package_icon.set_from_icon_name(package_icon)
-                except:
-                    # Se falhar, usar fallback
-                    self._set_fallback_icon(package_type)
+        if gicon:
+            self.package_icon.set_from_gicon(gicon)
         else:
             # Usar ícone padrão baseado no tipo
             self._set_fallback_icon(package_type)
         
         # Atualizar textos
-        self.package_name.set_markup(f"<b>{package_name}</b>")
+        self.package_name.set_text(package_name)
         self.package_version.set_text(f"{_('version_prefix')} {info.get('version', _('unknown'))}")
         
         # Formatar tamanho
@@ -497,12 +704,36 @@ class InstallerWindow(Adw.ApplicationWindow):
         self.select_button.set_tooltip_text(_("select_another_package"))
         self.select_button.remove_css_class("suggested-action")
     
+    def _resolve_package_icon(self, package_name, package_type):
+        """
+        Resolve o ícone do pacote instalado como Gio.Icon
+        
+        Returns:
+            Gio.Icon para um caminho de arquivo ou nome do tema, ou None se não encontrado
+        """
+        if package_name == 'Desconhecido':
+            return None
+        
+        package_icon = self.detector.get_package_icon(package_name, package_type)
+        if not package_icon:
+            return None
+        
+        # Caminho de arquivo inexistente: verificar antes em vez de deixar o GTK falhar
+        if package_icon.startswith('/') and not os.access(package_icon, os.F_OK):
+            return None
+        
+        # Gio.Icon.new_for_string aceita tanto caminhos absolutos quanto nomes do tema
+        try:
+            return Gio.Icon.new_for_string(package_icon)
+        except GLib.Error:
+            return None
+    
     def _set_description_with_tooltip(self, label, description):
         """
         Define a descrição no label com truncamento e tooltip se necessário
         
         Args:
-            label: Widget Gtk.Label onde definir a descrição
+            label: Widget Gtk.Inscription onde definir a descrição
             description: Texto da descrição
         """
         if not description or description in ['-', 'Sem descrição', 'Desconhecido']:
@@ -526,51 +757,52 @@ class InstallerWindow(Adw.ApplicationWindow):
     
     def _set_fallback_icon(self, package_type):
         """Define ícone padrão baseado no tipo de pacote"""
-        icon_map = {
-            'debian': 'application-x-deb',
-            'arch': 'package-x-generic',
-            'fedora': 'application-x-rpm',
-            'alpine': 'package-x-generic'
-        }
-        
-        icon_name = icon_map.get(package_type, 'package-x-generic')
-        self.package_icon.set_from_icon_name(icon_name)
+        self.package_icon.set_from_icon_name(_FALLBACK_ICONS.get(package_type, 'package-x-generic'))
     
     def _on_install_package(self, button):
         """Callback para instalação do pacote"""
         if not self.package_file_path or not self.package_info:
             return
         
-        package_type = self.package_info.get('type')
+        # Desabilitar botões enquanto o backend é definido (a verificação do
+        # PackageKit roda fora do loop principal)
+        self.install_button.set_sensitive(False)
+        self.select_button.set_sensitive(False)
         
+        # Pacote escolhido no clique (outro pode ser aberto enquanto o backend é definido)
+        file_path = self.package_file_path
+        package_type = self.package_info.get('type')
+        self.installer.prepare_backend(lambda: self._start_installation(file_path, package_type))
+    
+    def _start_installation(self, file_path, package_type):
+        """Verifica dependências e inicia a instalação (no loop principal)"""
         # Verificar dependências
         deps_ok, deps_msg = self.installer.check_dependencies(package_type)
         if not deps_ok:
+            self.install_button.set_sensitive(True)
+            self.select_button.set_sensitive(True)
             self._show_error(f"{_('missing_dependencies')}:\n{deps_msg}")
-            return
+            return False
         
-        # Mostrar progresso e desabilitar botões
+        # Mostrar progresso
         self._show_progress(True)
-        self.install_button.set_sensitive(False)
-        self.select_button.set_sensitive(False)
         
         # Iniciar instalação
         self.installer.install_package(
-            self.package_file_path,
+            file_path,
             package_type,
             self._on_progress_update,
             self._on_installation_complete
         )
-        
-        # Iniciar animação da barra de progresso
-        GLib.timeout_add(100, self._pulse_progress)
+        return False  # Remove from idle queue
     
-    def _pulse_progress(self):
-        """Anima a barra de progresso"""
-        if self.progress_box.get_visible():
-            self.progress_bar.pulse()
-            return True  # Continuar animação
-        return False  # Parar animação
+    def _on_pulse_tick(self, widget, frame_clock):
+        """Anima a barra de progresso (tick do frame clock, não roda com a janela oculta)"""
+        frame_time = frame_clock.get_frame_time()
+        if frame_time - self._last_pulse_time >= _PULSE_INTERVAL_US:
+            widget.pulse()
+            self._last_pulse_time = frame_time
+        return GLib.SOURCE_CONTINUE
     
     def _on_progress_update(self, message):
         """Callback para atualizações de progresso"""
@@ -584,15 +816,29 @@ class InstallerWindow(Adw.ApplicationWindow):
         
         if success:
             self._show_success(message)
+            # O pacote recém-instalado pode ter trazido um ícone
+            self._icon_cache.clear()
+            self.detector.clear_cache()
             # Recheck installation status after successful installation
             self._check_installation_status()
         else:
             self._show_error(message)
+        
+        # Só agora trocar para um pacote aberto durante a instalação
+        self._load_deferred_package()
     
     def _show_progress(self, show):
         """Mostra/oculta a barra de progresso"""
         self.progress_box.set_visible(show)
         self.details_box.set_visible(not show)
+        
+        # Animação da barra de progresso sincronizada com o frame clock
+        if show and self._pulse_id is None:
+            self._last_pulse_time = 0
+            self._pulse_id = self.progress_bar.add_tick_callback(self._on_pulse_tick)
+        elif not show and self._pulse_id is not None:
+            self.progress_bar.remove_tick_callback(self._pulse_id)
+            self._pulse_id = None
         if show:
             self.install_status.set_visible(False)
         else:
@@ -608,12 +854,13 @@ class InstallerWindow(Adw.ApplicationWindow):
                 self.install_button.set_sensitive(True)
                 self.select_button.set_sensitive(True)
                 self._show_info(_("installation_cancelled"))
+                self._load_deferred_package()
         else:
             self.close()
     
     def _on_settings(self, button):
         """Callback para abrir configurações"""
-        settings_window = SettingsWindow(self)
+        settings_window = SettingsWindow.get_or_create(self)
         settings_window.present()
     
     def _on_close_app(self, button):
@@ -641,50 +888,7 @@ class InstallerWindow(Adw.ApplicationWindow):
         Compara duas versões de pacote
         Retorna: 1 se version1 > version2, -1 se version1 < version2, 0 se iguais
         """
-        import re
-        
-        def normalize_version(version):
-            """Normaliza uma string de versão para comparação"""
-            if not version:
-                return []
-            
-            # Remove caracteres não numéricos e pontos, mantendo apenas números e pontos
-            version = re.sub(r'[^0-9.]', '', str(version))
-            
-            # Divide por pontos e converte para inteiros
-            parts = []
-            for part in version.split('.'):
-                if part.isdigit():
-                    parts.append(int(part))
-                elif part:
-                    # Se contém números, extrai o primeiro número
-                    numbers = re.findall(r'\d+', part)
-                    if numbers:
-                        parts.append(int(numbers[0]))
-            
-            return parts
-        
-        try:
-            v1_parts = normalize_version(version1)
-            v2_parts = normalize_version(version2)
-            
-            # Igualar o tamanho das listas preenchendo com zeros
-            max_len = max(len(v1_parts), len(v2_parts))
-            v1_parts.extend([0] * (max_len - len(v1_parts)))
-            v2_parts.extend([0] * (max_len - len(v2_parts)))
-            
-            # Comparar parte por parte
-            for v1, v2 in zip(v1_parts, v2_parts):
-                if v1 > v2:
-                    return 1
-                elif v1 < v2:
-                    return -1
-            
-            return 0  # Versões são iguais
-            
-        except (ValueError, TypeError):
-            # Se não conseguir comparar, considera como iguais
-            return 0
+        return _compare_versions_cached(str(version1 or ''), str(version2 or ''))
     
     def _format_size(self, size_str):
         """Formata o tamanho em KB, MB, GB"""
@@ -693,26 +897,21 @@ class InstallerWindow(Adw.ApplicationWindow):
         
         try:
             # Tentar extrair número do string
-            import re
-            numbers = re.findall(r'\d+', str(size_str))
-            if not numbers:
+            match = _NUM_RE.search(str(size_str))
+            if not match:
                 return size_str
             
-            size_bytes = int(numbers[0])
+            size_bytes = int(match.group())
             
             # Se o valor já parece estar em KB (comum em pacotes .deb)
             if 'k' in size_str.lower() or size_bytes < 10000:
                 size_bytes *= 1024  # Converter KB para bytes
             
-            # Converter para unidades apropriadas
-            if size_bytes < 1024:
-                return f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                return f"{size_bytes / 1024:.1f} KB"
-            elif size_bytes < 1024 * 1024 * 1024:
-                return f"{size_bytes / (1024 * 1024):.1f} MB"
-            else:
-                return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+            # Converter para a maior unidade apropriada
+            for threshold, unit in _SIZE_UNITS:
+                if size_bytes >= threshold:
+                    return f"{size_bytes / threshold:.1f} {unit}"
+            return f"{size_bytes} B"
                 
         except (ValueError, IndexError):
             return size_str
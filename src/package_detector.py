@@ -3,27 +3,127 @@ Detector de pacotes e informações
 Detecta o tipo de pacote e extrai informações relevantes
 """
 
+import gzip
+import io
+import mmap
 import os
+import re
 import subprocess
-import tempfile
-import shutil
+import tarfile
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 from .translator import get_translator, _
 
+# Descompressor zstd opcional para .deb com control.tar.zst (Ubuntu 21.10+)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bindings do rpm (python3-rpm), usados para ler cabeçalhos .rpm sem o CLI
+try:
+    import rpm
+except ImportError:
+    rpm = None
+
+# Ambiente mínimo para as ferramentas consultadas: saída estável (locale C),
+# sem stdin herdado e sem copiar o ambiente inteiro do processo
+_ENV = {'LC_ALL': 'C', 'PATH': os.environ.get('PATH', '/usr/bin:/bin:/usr/sbin:/sbin')}
+_SUBPROC_KW = dict(capture_output=True, stdin=subprocess.DEVNULL, env=_ENV)
+
+# Extensões suportadas -> tipo de pacote, reconhecidas com uma única busca
+# (o lookbehind exige um nome antes da extensão, como em arquivos ".deb" ocultos)
+_SUFFIX_RE = re.compile(r'(?<=[^/])\.(deb|rpm|apk|pkg\.tar\.(?:xz|zst))$', re.IGNORECASE)
+_SUFFIX_TYPES = {
+    'deb': 'debian',
+    'rpm': 'fedora',
+    'apk': 'alpine',
+    'pkg.tar.xz': 'arch',
+    'pkg.tar.zst': 'arch'
+}
+
+# Bancos de dados dos gerenciadores de pacotes; o mtime muda a cada instalação/remoção
+_STATUS_DBS = {
+    'debian': ('/var/lib/dpkg/status',),
+    'arch': ('/var/lib/pacman/local',),
+    'fedora': (
+        '/usr/lib/sysimage/rpm/rpmdb.sqlite',
+        '/var/lib/rpm/rpmdb.sqlite',
+        '/var/lib/rpm/Packages.db',
+        '/var/lib/rpm/Packages'
+    ),
+    'alpine': ('/lib/apk/db/installed',)
+}
+
+def _status_db_mtime(package_type: str) -> int:
+    """Retorna o mtime (ns) do banco de pacotes do tipo, usado como chave de cache"""
+    mtime = 0
+    for path in _STATUS_DBS.get(package_type, ()):
+        try:
+            mtime = max(mtime, os.stat(path).st_mtime_ns)
+        except OSError:
+            continue
+    return mtime
+
+# Diretórios de ícones e extensões aceitas, em ordem de preferência
+_ICON_LOCATIONS = (
+    ('/usr/share/pixmaps', ('.png', '.xpm', '.svg')),
+    ('/usr/share/icons/hicolor/48x48/apps', ('.png',)),
+    ('/usr/share/icons/hicolor/64x64/apps', ('.png',)),
+    ('/usr/share/icons/hicolor/scalable/apps', ('.svg',)),
+)
+
+# Diretórios com arquivos .desktop de aplicações
+_DESKTOP_DIRS = ('/usr/share/applications', '/usr/local/share/applications')
+
+@lru_cache(maxsize=64)
+def _scan_dir(directory: str, mtime_ns: int) -> frozenset:
+    """Nomes de arquivos de um diretório, lidos com um único scandir (mtime invalida o cache)"""
+    try:
+        with os.scandir(directory) as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
+def _dir_index(directory: str) -> frozenset:
+    """Índice dos nomes de arquivos de um diretório (ícones/.desktop), relido quando ele muda"""
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return frozenset()
+    return _scan_dir(directory, mtime_ns)
+
+def detect_package_type(file_path: str) -> Optional[str]:
+    """Detecta o tipo de pacote apenas pelo nome do arquivo (sem abri-lo)"""
+    match = _SUFFIX_RE.search(file_path)
+    return _SUFFIX_TYPES[match.group(1).lower()] if match else None
+
 class PackageDetector:
     """Classe para detectar e extrair informações de pacotes"""
     
-    SUPPORTED_EXTENSIONS = {
-        '.deb': 'debian',
-        '.pkg.tar.xz': 'arch',
-        '.pkg.tar.zst': 'arch', 
-        '.rpm': 'fedora',
-        '.apk': 'alpine'
-    }
+    # Distribuição do sistema, lida de /etc/os-release uma única vez por processo
+    _DISTRO = None
     
     def __init__(self):
-        self.distro = self._detect_distro()
+        # Consultas ao sistema memorizadas por (nome, tipo, mtime do banco de pacotes)
+        self._status_cache = lru_cache(maxsize=512)(self._query_status)
+        
+        # Pacotes instalados lidos de /var/lib/dpkg/status (nome -> versão)
+        self._deb_db = None
+        self._deb_db_mtime = 0
+    
+    def clear_cache(self):
+        """Descarta os resultados memorizados das consultas ao sistema"""
+        self._status_cache.cache_clear()
+        _scan_dir.cache_clear()
+    
+    @cached_property
+    def distro(self) -> str:
+        """Distribuição Linux atual (detectada sob demanda)"""
+        if PackageDetector._DISTRO is None:
+            PackageDetector._DISTRO = self._detect_distro()
+        return PackageDetector._DISTRO
     
     def _detect_distro(self) -> str:
         """Detecta a distribuição Linux atual"""
@@ -46,17 +146,7 @@ class PackageDetector:
     
     def detect_package_type(self, file_path: str) -> Optional[str]:
         """Detecta o tipo de pacote baseado na extensão"""
-        file_path = Path(file_path)
-        
-        # Verificar extensões compostas primeiro
-        if file_path.name.endswith('.pkg.tar.xz'):
-            return 'arch'
-        elif file_path.name.endswith('.pkg.tar.zst'):
-            return 'arch'
-        
-        # Verificar extensões simples
-        suffix = file_path.suffix.lower()
-        return self.SUPPORTED_EXTENSIONS.get(suffix)
+        return detect_package_type(file_path)
     
     def extract_package_info(self, file_path: str) -> Dict[str, str]:
         """Extrai informações do pacote"""
@@ -79,17 +169,51 @@ class PackageDetector:
         
         return {'error': _('package_not_implemented')}
     
+    def _read_deb_control(self, file_path: str) -> Optional[str]:
+        """Lê o arquivo control de um .deb localizando control.tar.* no contêiner ar"""
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:8] != b'!<arch>\n':
+                return None
+            
+            # Cabeçalhos ar de 60 bytes: nome (16) ... tamanho decimal (48:58)
+            offset = 8
+            while offset + 60 <= len(mm):
+                name = mm[offset:offset + 16].rstrip().rstrip(b'/')
+                size = int(mm[offset + 48:offset + 58])
+                data = offset + 60
+                if name.startswith(b'control.tar'):
+                    member = io.BytesIO(mm[data:data + size])
+                    if name.endswith(b'.zst'):
+                        if zstandard is None:
+                            return None
+                        member = zstandard.ZstdDecompressor().stream_reader(member)
+                    return self._read_control_member(member, ('control',))
+                # Membros são alinhados em 2 bytes
+                offset = data + size + (size & 1)
+        
+        return None
+    
     def _extract_deb_info(self, file_path: str) -> Dict[str, str]:
         """Extrai informações de pacotes .deb"""
         try:
-            result = subprocess.run(['dpkg', '-I', file_path], 
-                                  capture_output=True, text=True, check=True)
+            try:
+                control = self._read_deb_control(file_path)
+            except (OSError, ValueError, tarfile.TarError):
+                control = None
+            
+            if control is None:
+                # Compressão não suportada em processo: pedir o control ao dpkg-deb
+                result = subprocess.run(['dpkg-deb', '-f', file_path], 
+                                      text=True, check=True, **_SUBPROC_KW)
+                control = result.stdout
             
             info = {}
-            for line in result.stdout.split('\n'):
-                line = line.strip()
-                if ':' in line and not line.startswith(' '):
-                    key, value = line.split(':', 1)
+            for line in control.split('\n'):
+                # Linhas de continuação (descrição longa) começam com espaço
+                if line[:1] in (' ', '\t'):
+                    continue
+                key, sep, value = line.partition(':')
+                if sep:
                     info[key.strip().lower()] = value.strip()
             
             return {
@@ -103,46 +227,81 @@ class PackageDetector:
         except subprocess.CalledProcessError:
             return {'error': _('error_reading_deb')}
     
+    def _read_control_member(self, fileobj, names: Tuple[str, ...]) -> Optional[str]:
+        """Lê em memória o primeiro membro do tar com um dos nomes dados, parando ao encontrá-lo"""
+        with tarfile.open(fileobj=fileobj, mode='r|*') as tf:
+            for member in tf:
+                name = member.name[2:] if member.name.startswith('./') else member.name
+                if name in names:
+                    data = tf.extractfile(member)
+                    return data.read().decode('utf-8', 'replace') if data else None
+        return None
+    
     def _extract_arch_info(self, file_path: str) -> Dict[str, str]:
         """Extrai informações de pacotes Arch (.pkg.tar.xz/.pkg.tar.zst)"""
         try:
-            # Usar tar para extrair .PKGINFO
-            with tempfile.TemporaryDirectory() as temp_dir:
-                subprocess.run(['tar', '-xf', file_path, '-C', temp_dir, '.PKGINFO'], 
-                             check=True, capture_output=True)
+            try:
+                with open(file_path, 'rb') as f:
+                    content = self._read_control_member(f, ('.PKGINFO',))
+            except tarfile.TarError:
+                # tarfile não suporta zstd em todas as versões do Python: ler via tar para stdout
+                result = subprocess.run(['tar', '-xOf', file_path, '.PKGINFO'], 
+                                      check=True, **_SUBPROC_KW)
+                content = result.stdout.decode('utf-8', 'replace')
+            
+            if content is not None:
+                info = {}
+                for line in content.splitlines():
+                    key, sep, value = line.partition('=')
+                    if sep:
+                        info[key.strip()] = value.strip()
                 
-                pkginfo_path = os.path.join(temp_dir, '.PKGINFO')
-                if os.path.exists(pkginfo_path):
-                    info = {}
-                    with open(pkginfo_path, 'r') as f:
-                        for line in f:
-                            if '=' in line:
-                                key, value = line.strip().split('=', 1)
-                                info[key.strip()] = value.strip()
-                    
-                    return {
-                        'name': info.get('pkgname', 'Desconhecido'),
-                        'version': info.get('pkgver', 'Desconhecida'),
-                        'description': info.get('pkgdesc', 'Sem descrição'),
-                        'maintainer': info.get('packager', 'Desconhecido'),
-                        'size': info.get('size', 'Desconhecido'),
-                        'type': 'arch'
-                    }
+                return {
+                    'name': info.get('pkgname', 'Desconhecido'),
+                    'version': info.get('pkgver', 'Desconhecida'),
+                    'description': info.get('pkgdesc', 'Sem descrição'),
+                    'maintainer': info.get('packager', 'Desconhecido'),
+                    'size': info.get('size', 'Desconhecido'),
+                    'type': 'arch'
+                }
         except:
             pass
         
         return {'error': _('error_reading_arch')}
     
+    def _read_rpm_header(self, file_path: str) -> Dict[str, str]:
+        """Lê o cabeçalho de um .rpm diretamente pela biblioteca do rpm"""
+        ts = rpm.TransactionSet()
+        # Assim como rpm -qip, não exigir chave para pacotes assinados
+        ts.setVSFlags(rpm._RPMVSF_NOSIGNATURES)
+        with open(file_path, 'rb') as f:
+            hdr = ts.hdrFromFdno(f.fileno())
+        
+        return {
+            'name': hdr[rpm.RPMTAG_NAME] or 'Desconhecido',
+            'version': hdr[rpm.RPMTAG_VERSION] or 'Desconhecida',
+            'description': hdr[rpm.RPMTAG_SUMMARY] or 'Sem descrição',
+            'maintainer': hdr[rpm.RPMTAG_VENDOR] or 'Desconhecido',
+            'size': str(hdr[rpm.RPMTAG_SIZE]) if hdr[rpm.RPMTAG_SIZE] else 'Desconhecido',
+            'type': 'fedora'
+        }
+    
     def _extract_rpm_info(self, file_path: str) -> Dict[str, str]:
         """Extrai informações de pacotes .rpm"""
+        if rpm is not None:
+            try:
+                return self._read_rpm_header(file_path)
+            except (OSError, rpm.error):
+                pass  # Cair para o CLI do rpm
+        
         try:
             result = subprocess.run(['rpm', '-qip', file_path], 
-                                  capture_output=True, text=True, check=True)
+                                  text=True, check=True, **_SUBPROC_KW)
             
             info = {}
             for line in result.stdout.split('\n'):
-                if ':' in line:
-                    key, value = line.split(':', 1)
+                key, sep, value = line.partition(':')
+                if sep:
                     info[key.strip().lower()] = value.strip()
             
             return {
@@ -159,34 +318,23 @@ class PackageDetector:
     def _extract_apk_info(self, file_path: str) -> Dict[str, str]:
         """Extrai informações de pacotes .apk (Alpine)"""
         try:
-            # Alpine apk info
-            result = subprocess.run(['apk', 'info', '--who-owns', file_path], 
-                                  capture_output=True, text=True)
-            
-            # Fallback: tentar extrair com tar
-            with tempfile.TemporaryDirectory() as temp_dir:
-                try:
-                    subprocess.run(['tar', '-xzf', file_path, '-C', temp_dir], 
-                                 check=True, capture_output=True)
-                    
-                    # Procurar por arquivos de controle
-                    control_files = ['.PKGINFO', 'APKINDEX']
-                    for cf in control_files:
-                        cf_path = os.path.join(temp_dir, cf)
-                        if os.path.exists(cf_path):
-                            with open(cf_path, 'r') as f:
-                                content = f.read()
-                                # Parsing básico
-                                return {
-                                    'name': Path(file_path).stem.split('-')[0],
-                                    'version': 'Desconhecida',
-                                    'description': 'Pacote Alpine',
-                                    'maintainer': 'Alpine Linux',
-                                    'size': 'Desconhecido',
-                                    'type': 'alpine'
-                                }
-                except:
-                    pass
+            # O .apk é uma sequência de streams gzip; gzip.open lê todos como um só tar
+            try:
+                with gzip.open(file_path, 'rb') as f:
+                    content = self._read_control_member(f, ('.PKGINFO', 'APKINDEX'))
+                
+                if content is not None:
+                    # Parsing básico
+                    return {
+                        'name': Path(file_path).stem.split('-')[0],
+                        'version': 'Desconhecida',
+                        'description': 'Pacote Alpine',
+                        'maintainer': 'Alpine Linux',
+                        'size': 'Desconhecido',
+                        'type': 'alpine'
+                    }
+            except:
+                pass
             
             # Fallback básico
             filename = Path(file_path).stem
@@ -213,99 +361,59 @@ class PackageDetector:
         
         return self.distro in compatibility_map.get(package_type, [])
     
-    def is_package_installed(self, package_name: str, package_type: str) -> tuple[bool, str]:
+    def get_package_status(self, package_name: str, package_type: str) -> Tuple[bool, str, Optional[str], Optional[str]]:
         """
-        Verifica se um pacote já está instalado no sistema
+        Consulta de uma só vez o estado de um pacote no sistema
         
         Args:
             package_name: Nome do pacote
             package_type: Tipo do pacote (debian, arch, fedora, alpine)
             
         Returns:
-            tuple: (is_installed, version_or_message)
+            tuple: (is_installed, status_message, installed_version, icon)
         """
         if not package_name or package_name == 'Desconhecido':
-            return False, "Nome do pacote não disponível"
+            return False, "Nome do pacote não disponível", None, None
         
+        # O cache guarda só a chave da mensagem; a tradução é feita no idioma atual
+        installed, (message_key, message_args), version, icon = self._status_cache(
+            package_name, package_type, _status_db_mtime(package_type))
+        return installed, _(message_key, **message_args), version, icon
+    
+    def _query_status(self, package_name: str, package_type: str, db_mtime: int) -> Tuple[bool, Tuple[str, Dict[str, str]], Optional[str], Optional[str]]:
+        """Consulta o gerenciador de pacotes e o ícone (memorizado; db_mtime invalida o cache)
+        
+        A mensagem é devolvida como (chave, parâmetros), sem tradução, para que o
+        resultado memorizado continue válido após uma troca de idioma.
+        """
         try:
             if package_type == 'debian':
-                return self._check_deb_installed(package_name)
+                status = self._deb_status(package_name)
             elif package_type == 'arch':
-                return self._check_arch_installed(package_name)
+                status = self._arch_status(package_name)
             elif package_type == 'fedora':
-                return self._check_rpm_installed(package_name)
+                status = self._rpm_status(package_name)
             elif package_type == 'alpine':
-                return self._check_apk_installed(package_name)
+                status = self._apk_status(package_name)
+            else:
+                status = (False, ("unsupported_package_type", {}), None)
         except Exception as e:
-            return False, _("error_checking_package", error=str(e))
+            status = (False, ("error_checking_package", {"error": str(e)}), None)
         
-        return False, _("unsupported_package_type")
+        return (*status, self._find_icon(package_name, package_type))
     
-    def _check_deb_installed(self, package_name: str) -> tuple[bool, str]:
-        """Verifica se um pacote .deb está instalado"""
-        try:
-            result = subprocess.run(['dpkg', '-l', package_name], 
-                                  capture_output=True, text=True, check=True)
-            
-            # Procurar por linha que indica instalação
-            for line in result.stdout.split('\n'):
-                if line.startswith('ii') and package_name in line:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        version = parts[2]
-                        return True, _("installed_version", version=version)
-            
-            return False, _("package_not_installed_status")
-        except subprocess.CalledProcessError:
-            return False, _("package_not_installed_status")
-    
-    def _check_arch_installed(self, package_name: str) -> tuple[bool, str]:
-        """Verifica se um pacote Arch está instalado"""
-        try:
-            result = subprocess.run(['pacman', '-Q', package_name], 
-                                  capture_output=True, text=True, check=True)
-            
-            # Formato: nome versão
-            if result.stdout.strip():
-                parts = result.stdout.strip().split()
-                if len(parts) >= 2:
-                    version = parts[1]
-                    return True, _("installed_version", version=version)
-                else:
-                    return True, "Instalado (versão desconhecida)"
-            
-            return False, "Pacote não instalado"
-        except subprocess.CalledProcessError:
-            return False, "Pacote não instalado"
-    
-    def _check_rpm_installed(self, package_name: str) -> tuple[bool, str]:
-        """Verifica se um pacote .rpm está instalado"""
-        try:
-            result = subprocess.run(['rpm', '-q', package_name], 
-                                  capture_output=True, text=True, check=True)
-            
-            if result.stdout.strip() and not result.stdout.startswith('package'):
-                # Formato: nome-versão-release.arch
-                installed_info = result.stdout.strip()
-                return True, f"Instalado: {installed_info}"
-            
-            return False, "Pacote não instalado"
-        except subprocess.CalledProcessError:
-            return False, "Pacote não instalado"
-    
-    def _check_apk_installed(self, package_name: str) -> tuple[bool, str]:
-        """Verifica se um pacote .apk está instalado"""
-        try:
-            result = subprocess.run(['apk', 'info', '-e', package_name], 
-                                  capture_output=True, text=True, check=True)
-            
-            if result.stdout.strip():
-                installed_info = result.stdout.strip()
-                return True, f"Instalado: {installed_info}"
+    def is_package_installed(self, package_name: str, package_type: str) -> tuple[bool, str]:
+        """
+        Verifica se um pacote já está instalado no sistema
+        
+        Args:
+            package_name: Nome do pacote
+            package_type: Tipo do pacote (debian, arch, fedora, alpine)
             
-            return False, "Pacote não instalado"
-        except subprocess.CalledProcessError:
-            return False, "Pacote não instalado"
+        Returns:
+            tuple: (is_installed, version_or_message)
+        """
+        return self.get_package_status(package_name, package_type)[:2]
     
     def get_installed_version(self, package_name: str, package_type: str) -> Optional[str]:
         """
@@ -318,101 +426,150 @@ class PackageDetector:
         Returns:
             str: Versão instalada ou None se não encontrada
         """
-        if not package_name or package_name == 'Desconhecido':
-            return None
+        return self.get_package_status(package_name, package_type)[2]
+    
+    def get_package_icon(self, package_name: str, package_type: str) -> Optional[str]:
+        """
+        Busca o ícone de um pacote instalado
         
+        Args:
+            package_name: Nome do pacote
+            package_type: Tipo do pacote (debian, arch, fedora, alpine)
+            
+        Returns:
+            str: Nome do ícone ou caminho para o arquivo de ícone, ou None se não encontrado
+        """
+        return self.get_package_status(package_name, package_type)[3]
+    
+    def _load_deb_db(self) -> Optional[Dict[str, str]]:
+        """Lê o banco do dpkg uma única vez, relendo apenas quando o arquivo muda"""
+        status_file = _STATUS_DBS['debian'][0]
         try:
-            if package_type == 'debian':
-                return self._get_deb_version(package_name)
-            elif package_type == 'arch':
-                return self._get_arch_version(package_name)
-            elif package_type == 'fedora':
-                return self._get_rpm_version(package_name)
-            elif package_type == 'alpine':
-                return self._get_apk_version(package_name)
-        except Exception:
+            mtime = os.stat(status_file).st_mtime_ns
+            if self._deb_db is not None and mtime == self._deb_db_mtime:
+                return self._deb_db
+            
+            with open(status_file, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except OSError:
             return None
         
-        return None
+        installed = {}
+        for stanza in content.split('\n\n'):
+            name = status = version = None
+            for line in stanza.split('\n'):
+                if line.startswith('Package: '):
+                    name = line[9:].strip()
+                elif line.startswith('Status: '):
+                    status = line[8:].split()
+                elif line.startswith('Version: '):
+                    version = line[9:].strip()
+            
+            # Equivalente ao estado "ii" do dpkg -l
+            if name and version and status and status[0] == 'install' and status[-1] == 'installed':
+                installed[name] = version
+        
+        self._deb_db = installed
+        self._deb_db_mtime = mtime
+        return installed
     
-    def _get_deb_version(self, package_name: str) -> Optional[str]:
-        """Obtém a versão instalada de um pacote .deb"""
+    def _deb_status(self, package_name: str) -> Tuple[bool, Tuple[str, Dict[str, str]], Optional[str]]:
+        """Estado de um pacote .deb: (instalado, (chave da mensagem, parâmetros), versão)"""
+        deb_db = self._load_deb_db()
+        if deb_db is not None:
+            version = deb_db.get(package_name)
+        else:
+            version = self._get_deb_version_dpkg(package_name)
+        
+        if version:
+            return True, ("installed_version", {"version": version}), version
+        return False, ("package_not_installed_status", {}), None
+    
+    def _get_deb_version_dpkg(self, package_name: str) -> Optional[str]:
+        """Obtém a versão instalada pelo dpkg (quando o banco de status não pode ser lido)"""
         try:
-            result = subprocess.run(['dpkg', '-l', package_name], 
-                                  capture_output=True, text=True, check=True)
+            result = subprocess.run(['dpkg-query', '-W', '-f=${Status}\t${Version}\n', package_name], 
+                                  check=True, **_SUBPROC_KW)
             
-            for line in result.stdout.split('\n'):
-                if line.startswith('ii') and package_name in line:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        return parts[2]
+            # Formato: "install ok installed<TAB>versão" (equivalente ao "ii" do dpkg -l)
+            status, _sep, version = result.stdout.partition(b'\n')[0].partition(b'\t')
+            status = status.split()
+            if status and status[0] == b'install' and status[-1] == b'installed' and version:
+                return version.strip().decode('utf-8', 'replace')
             
             return None
         except subprocess.CalledProcessError:
             return None
     
-    def _get_arch_version(self, package_name: str) -> Optional[str]:
-        """Obtém a versão instalada de um pacote Arch"""
+    def _arch_status(self, package_name: str) -> Tuple[bool, Tuple[str, Dict[str, str]], Optional[str]]:
+        """Estado de um pacote Arch: (instalado, (chave da mensagem, parâmetros), versão)"""
         try:
             result = subprocess.run(['pacman', '-Q', package_name], 
-                                  capture_output=True, text=True, check=True)
+                                  check=True, **_SUBPROC_KW)
             
-            if result.stdout.strip():
-                parts = result.stdout.strip().split()
-                if len(parts) >= 2:
-                    return parts[1]
+            # Formato: nome versão
+            parts = result.stdout.split()
+            if len(parts) >= 2:
+                version = parts[1].decode('utf-8', 'replace')
+                return True, ("installed_version", {"version": version}), version
+            elif parts:
+                return True, ("Instalado (versão desconhecida)", {}), None
             
-            return None
+            return False, ("Pacote não instalado", {}), None
         except subprocess.CalledProcessError:
-            return None
+            return False, ("Pacote não instalado", {}), None
     
-    def _get_rpm_version(self, package_name: str) -> Optional[str]:
-        """Obtém a versão instalada de um pacote .rpm"""
+    def _rpm_status(self, package_name: str) -> Tuple[bool, Tuple[str, Dict[str, str]], Optional[str]]:
+        """Estado de um pacote .rpm: (instalado, (chave da mensagem, parâmetros), versão) em uma única consulta"""
         try:
-            result = subprocess.run(['rpm', '-q', '--queryformat', '%{VERSION}-%{RELEASE}', package_name], 
-                                  capture_output=True, text=True, check=True)
+            result = subprocess.run(['rpm', '-q', '--queryformat', '%{NAME}-%{VERSION}-%{RELEASE}.%{ARCH}\t%{VERSION}-%{RELEASE}\n', package_name], 
+                                  check=True, **_SUBPROC_KW)
             
-            if result.stdout.strip() and not result.stdout.startswith('package'):
-                return result.stdout.strip()
+            # Formato: nome-versão-release.arch<TAB>versão-release
+            line = result.stdout.partition(b'\n')[0].strip()
+            if line and not line.startswith(b'package'):
+                installed_info, _sep, version = line.decode('utf-8', 'replace').partition('\t')
+                return True, (f"Instalado: {installed_info}", {}), version or None
             
-            return None
+            return False, ("Pacote não instalado", {}), None
         except subprocess.CalledProcessError:
-            return None
+            return False, ("Pacote não instalado", {}), None
+    
+    def _apk_status(self, package_name: str) -> Tuple[bool, Tuple[str, Dict[str, str]], Optional[str]]:
+        """Estado de um pacote .apk: (instalado, (chave da mensagem, parâmetros), versão)"""
+        try:
+            result = subprocess.run(['apk', 'info', '-e', package_name], 
+                                  check=True, **_SUBPROC_KW)
+            
+            if result.stdout.strip():
+                installed_info = result.stdout.strip().decode('utf-8', 'replace')
+                return True, (f"Instalado: {installed_info}", {}), self._get_apk_version(package_name)
+            
+            return False, ("Pacote não instalado", {}), None
+        except subprocess.CalledProcessError:
+            return False, ("Pacote não instalado", {}), None
     
     def _get_apk_version(self, package_name: str) -> Optional[str]:
         """Obtém a versão instalada de um pacote .apk"""
         try:
             result = subprocess.run(['apk', 'info', package_name], 
-                                  capture_output=True, text=True, check=True)
+                                  check=True, **_SUBPROC_KW)
             
-            # Procurar por linha com versão
-            for line in result.stdout.split('\n'):
-                if 'version:' in line.lower():
-                    return line.split(':', 1)[1].strip()
-                elif package_name in line and '-' in line:
+            # Procurar por linha com versão (bytes; só o valor retornado é decodificado)
+            name = package_name.encode()
+            for line in result.stdout.split(b'\n'):
+                if b'version:' in line.lower():
+                    return line.partition(b':')[2].strip().decode('utf-8', 'replace')
+                elif name in line and b'-' in line:
                     # Tentar extrair versão do formato nome-versão
-                    parts = line.strip().split('-')
-                    if len(parts) > 1:
-                        return '-'.join(parts[1:])
+                    return line.strip().partition(b'-')[2].decode('utf-8', 'replace')
             
             return None
         except subprocess.CalledProcessError:
             return None
     
-    def get_package_icon(self, package_name: str, package_type: str) -> Optional[str]:
-        """
-        Busca o ícone de um pacote instalado
-        
-        Args:
-            package_name: Nome do pacote
-            package_type: Tipo do pacote (debian, arch, fedora, alpine)
-            
-        Returns:
-            str: Nome do ícone ou caminho para o arquivo de ícone, ou None se não encontrado
-        """
-        if not package_name or package_name == 'Desconhecido':
-            return None
-        
+    def _find_icon(self, package_name: str, package_type: str) -> Optional[str]:
+        """Busca o ícone do pacote conforme o tipo"""
         try:
             if package_type == 'debian':
                 return self._get_deb_icon(package_name)
@@ -429,30 +586,19 @@ class PackageDetector:
     
     def _get_deb_icon(self, package_name: str) -> Optional[str]:
         """Busca ícone de um pacote .deb instalado"""
-        # Locais comuns para ícones de aplicações
-        icon_paths = [
-            f"/usr/share/pixmaps/{package_name}.png",
-            f"/usr/share/pixmaps/{package_name}.xpm",
-            f"/usr/share/pixmaps/{package_name}.svg",
-            f"/usr/share/icons/hicolor/48x48/apps/{package_name}.png",
-            f"/usr/share/icons/hicolor/64x64/apps/{package_name}.png",
-            f"/usr/share/icons/hicolor/scalable/apps/{package_name}.svg",
-        ]
-        
-        # Verificar se algum arquivo de ícone existe
-        for icon_path in icon_paths:
-            if os.path.exists(icon_path):
-                return icon_path
-        
-        # Tentar buscar arquivo .desktop para extrair ícone
-        desktop_paths = [
-            f"/usr/share/applications/{package_name}.desktop",
-            f"/usr/local/share/applications/{package_name}.desktop",
-        ]
+        # Locais comuns para ícones de aplicações (consulta ao índice em memória)
+        for directory, extensions in _ICON_LOCATIONS:
+            index = _dir_index(directory)
+            for ext in extensions:
+                if package_name + ext in index:
+                    return f"{directory}/{package_name}{ext}"
         
-        for desktop_path in desktop_paths:
-            if os.path.exists(desktop_path):
-                icon_name = self._extract_icon_from_desktop(desktop_path)
+        # Tentar buscar arquivo .desktop para extrair ícone (pacotes sem interface
+        # gráfica, o caso mais comum, terminam aqui sem nenhum acesso ao disco)
+        desktop_name = f"{package_name}.desktop"
+        for directory in _DESKTOP_DIRS:
+            if desktop_name in _dir_index(directory):
+                icon_name = self._extract_icon_from_desktop(f"{directory}/{desktop_name}")
                 if icon_name:
                     return icon_name
         
@@ -479,11 +625,11 @@ class PackageDetector:
             with open(desktop_file_path, 'r', encoding='utf-8') as f:
                 for line in f:
                     if line.startswith('Icon='):
-                        icon_name = line.split('=', 1)[1].strip()
+                        icon_name = line.partition('=')[2].strip()
                         
                         # Se é um caminho absoluto, verificar se existe
                         if icon_name.startswith('/'):
-                            if os.path.exists(icon_name):
+                            if os.access(icon_name, os.F_OK):
                                 return icon_name
                         else:
                             # É um nome de ícone, retornar para uso com tema de ícones
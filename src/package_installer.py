@@ -3,18 +3,103 @@ Instalador de pacotes
 Gerencia a instalação de diferentes tipos de pacotes
 """
 
+import os
+import select
+import shutil
 import subprocess
 import threading
+import time
+from collections import deque
 from typing import Callable, Optional
-from gi.repository import GLib
+import gi
+from gi.repository import GLib, Gio
 from .translator import get_translator, _
 
+# Erros de transação do PackageKit chegam como PK_CLIENT_ERROR com código 0xff + PkErrorEnum
+_PK_ERROR_OFFSET = 0xff
+
+# Intervalo mínimo entre atualizações de progresso (segundos) e tamanho de leitura da saída
+_PROGRESS_INTERVAL = 0.1
+_READ_SIZE = 65536
+
+# Linhas finais da saída mostradas em caso de erro
+_ERROR_TAIL_LINES = 5
+
+# Executáveis já encontrados no PATH (só resultados positivos são memorizados,
+# para que uma ferramenta instalada com o aplicativo aberto seja percebida)
+_found_commands = set()
+
+def _has_command(name: str) -> bool:
+    """Verifica se um executável está no PATH"""
+    if name in _found_commands:
+        return True
+    if shutil.which(name) is None:
+        return False
+    _found_commands.add(name)
+    return True
+
 class PackageInstaller:
     """Classe para instalar pacotes de diferentes distribuições"""
     
-    def __init__(self):
+    def __init__(self, use_packagekit: bool = False):
         self.is_installing = False
         self.process = None
+        # PackageKit é opcional e só usado quando habilitado nas configurações
+        self._use_packagekit = use_packagekit
+        self._packagekit = None  # None: ainda não verificado; False: indisponível
+        self._pk_client = None
+        self._cancellable = None
+    
+    def set_use_packagekit(self, enabled: bool):
+        """Liga/desliga o backend PackageKit (verificado de novo na próxima instalação)"""
+        self._use_packagekit = enabled
+        self._packagekit = None
+    
+    def prepare_backend(self, callback: Callable[[], None]):
+        """
+        Define o backend antes de instalar, sem bloquear o loop principal
+        
+        A verificação do PackageKit (chamada D-Bus ao daemon, que pode precisar ser
+        iniciado) roda em uma thread; callback() é chamado no loop principal do GLib.
+        
+        Args:
+            callback: Chamado quando check_dependencies/install_package puderem ser usados
+        """
+        if self._packagekit is not None or not self._use_packagekit:
+            callback()
+            return
+        
+        thread = threading.Thread(target=self._probe_worker, args=(callback,))
+        thread.daemon = True
+        thread.start()
+    
+    def _probe_worker(self, callback: Callable[[], None]):
+        """Worker thread que verifica o suporte do PackageKit a arquivos locais"""
+        self._packagekit = self._probe_packagekit()
+        GLib.idle_add(callback)
+    
+    def _probe_packagekit(self):
+        """
+        Importa o PackageKitGlib e confirma que o daemon suporta a instalação de
+        arquivos locais; retorna o módulo ou False
+        """
+        try:
+            gi.require_version('PackageKitGlib', '1.0')
+            from gi.repository import PackageKitGlib
+            
+            control = PackageKitGlib.Control()
+            control.get_properties(None)
+            if control.props.roles & (1 << PackageKitGlib.RoleEnum.INSTALL_FILES):
+                return PackageKitGlib
+        except (ImportError, ValueError, GLib.Error):
+            pass
+        return False
+    
+    def _get_packagekit(self):
+        """Módulo PackageKitGlib se o backend estiver habilitado e já verificado por prepare_backend()"""
+        if not self._use_packagekit:
+            return None
+        return self._packagekit or None
     
     def install_package(self, file_path: str, package_type: str, 
                        progress_callback: Callable[[str], None],
@@ -34,6 +119,15 @@ class PackageInstaller:
         
         self.is_installing = True
         
+        if self._get_packagekit() is not None:
+            self._install_with_packagekit(file_path, package_type, progress_callback, completion_callback)
+        else:
+            self._start_install_thread(file_path, package_type, progress_callback, completion_callback)
+    
+    def _start_install_thread(self, file_path: str, package_type: str,
+                             progress_callback: Callable[[str], None],
+                             completion_callback: Callable[[bool, str], None]):
+        """Instala com pkexec e a ferramenta nativa da distribuição"""
         # Executar instalação em thread separada
         thread = threading.Thread(
             target=self._install_worker,
@@ -58,34 +152,56 @@ class PackageInstaller:
             GLib.idle_add(progress_callback, _("starting_installation"))
             
             # Executar comando
-            self.process = subprocess.Popen(
+            process = self.process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
+                stderr=subprocess.STDOUT
             )
             
-            # Ler saída linha por linha
-            output_lines = []
-            while True:
-                line = self.process.stdout.readline()
-                if not line and self.process.poll() is not None:
-                    break
+            # Ler a saída em blocos sem bloquear, agrupando as linhas
+            fd = process.stdout.fileno()
+            os.set_blocking(fd, False)
+            output_lines = deque(maxlen=_ERROR_TAIL_LINES)  # Só as últimas linhas importam
+            pending = b''
+            posted_line = None
+            last_update = 0.0
+            eof = False
+            while not eof:
+                if select.select([fd], [], [], _PROGRESS_INTERVAL)[0]:
+                    while True:
+                        try:
+                            chunk = os.read(fd, _READ_SIZE)
+                        except BlockingIOError:
+                            break
+                        if not chunk:
+                            eof = True
+                            break
+                        pending += chunk
+                    
+                    # \r também separa linhas (barras de progresso do dpkg/pacman)
+                    *lines, pending = pending.replace(b'\r', b'\n').split(b'\n')
+                    for line in lines:
+                        line = line.decode('utf-8', 'replace').strip()
+                        if line:
+                            output_lines.append(line)
+                
+                if eof and pending.strip():
+                    output_lines.append(pending.decode('utf-8', 'replace').strip())
                 
-                if line:
-                    line = line.strip()
-                    output_lines.append(line)
-                    # Atualizar progresso com a linha atual
-                    GLib.idle_add(progress_callback, _("installing_progress", progress=line[:50]))
+                # No máximo uma atualização de progresso a cada _PROGRESS_INTERVAL
+                now = time.monotonic()
+                if output_lines and output_lines[-1] is not posted_line and now - last_update >= _PROGRESS_INTERVAL:
+                    posted_line = output_lines[-1]
+                    last_update = now
+                    GLib.idle_add(progress_callback, _("installing_progress", progress=posted_line[:50]))
             
             # Verificar resultado
-            return_code = self.process.poll()
+            return_code = process.wait()
             
             if return_code == 0:
                 GLib.idle_add(completion_callback, True, _("package_installed_successfully"))
             else:
-                error_msg = "\n".join(output_lines[-5:])  # Últimas 5 linhas
+                error_msg = "\n".join(output_lines)
                 GLib.idle_add(completion_callback, False, 
                             _("installation_error", error=error_msg))
                 
@@ -96,6 +212,66 @@ class PackageInstaller:
             self.is_installing = False
             self.process = None
     
+    def _install_with_packagekit(self, file_path: str, package_type: str,
+                                progress_callback: Callable[[str], None],
+                                completion_callback: Callable[[bool, str], None]):
+        """Instala pelo PackageKit; a transação roda no loop principal do GLib"""
+        PackageKitGlib = self._get_packagekit()
+        if self._pk_client is None:
+            self._pk_client = PackageKitGlib.Client()
+        cancellable = self._cancellable = Gio.Cancellable()
+        client_error_domain = GLib.quark_to_string(PackageKitGlib.client_error_quark())
+        
+        progress_callback(_("starting_installation"))
+        
+        def on_progress(progress, progress_type, *user_data):
+            if progress_type == PackageKitGlib.ProgressType.STATUS:
+                status = PackageKitGlib.status_enum_to_string(progress.props.status)
+                progress_callback(_("installing_progress", progress=status))
+        
+        def on_finished(client, result, *user_data):
+            if cancellable.is_cancelled():
+                # cancel_installation() já liberou o estado e a interface já foi avisada
+                try:
+                    client.generic_finish(result)
+                except GLib.Error:
+                    pass
+                return
+            
+            self._cancellable = None
+            try:
+                results = client.generic_finish(result)
+                error = results.get_error_code()
+                error_code = error.get_code() if error else None
+                error_msg = error.get_details() if error else None
+            except GLib.Error as e:
+                # Só erros PK_CLIENT_ERROR carregam um PkErrorEnum deslocado
+                if e.domain == client_error_domain and e.code >= _PK_ERROR_OFFSET:
+                    error_code = e.code - _PK_ERROR_OFFSET
+                else:
+                    error_code = None
+                error_msg = e.message
+            
+            if error_code == PackageKitGlib.ErrorEnum.NOT_SUPPORTED:
+                # Backend sem suporte a arquivos locais: usar o caminho com pkexec
+                deps_ok, deps_msg = self._check_native_dependencies(package_type)
+                if not deps_ok:
+                    self.is_installing = False
+                    completion_callback(False, deps_msg)
+                    return
+                self._start_install_thread(file_path, package_type, progress_callback, completion_callback)
+                return
+            
+            self.is_installing = False
+            if error_msg is None:
+                completion_callback(True, _("package_installed_successfully"))
+            else:
+                completion_callback(False, _("installation_error", error=error_msg))
+        
+        # Sem ONLY_TRUSTED: pacotes locais normalmente não são assinados
+        self._pk_client.install_files_async(0, [file_path], self._cancellable,
+                                            on_progress, None, on_finished, None)
+    
     def _get_install_command(self, file_path: str, package_type: str) -> Optional[list]:
         """Retorna o comando de instalação apropriado"""
         commands = {
@@ -109,6 +285,12 @@ class PackageInstaller:
     
     def cancel_installation(self):
         """Cancela a instalação em andamento"""
+        if self._cancellable and self.is_installing:
+            self._cancellable.cancel()
+            self._cancellable = None
+            self.is_installing = False
+            return True
+        
         if self.process and self.is_installing:
             try:
                 self.process.terminate()
@@ -126,6 +308,14 @@ class PackageInstaller:
     
     def check_dependencies(self, package_type: str) -> tuple[bool, str]:
         """Verifica se as dependências necessárias estão instaladas"""
+        # Pelo PackageKit o daemon instala o pacote: pkexec e a ferramenta nativa não são usados
+        if self._get_packagekit() is not None:
+            return True, _("all_dependencies_available")
+        
+        return self._check_native_dependencies(package_type)
+    
+    def _check_native_dependencies(self, package_type: str) -> tuple[bool, str]:
+        """Verifica as dependências do caminho com pkexec e a ferramenta nativa"""
         dependencies = {
             'debian': ['dpkg', 'pkexec'],
             'arch': ['pacman', 'pkexec'],
@@ -137,10 +327,7 @@ class PackageInstaller:
         missing = []
         
         for dep in required:
-            try:
-                subprocess.run(['which', dep], check=True, 
-                             capture_output=True)
-            except subprocess.CalledProcessError:
+            if not _has_command(dep):
                 missing.append(dep)
         
         if missing:
@@ -3,30 +3,89 @@ Janela de configurações
 Interface para configurações do aplicativo
 """
 
-import os
-from gi.repository import Gtk, Adw, GLib
+from gi.repository import Gtk, Adw, GLib, Gio, Gdk
 from .translator import get_translator, _
+from .config import load_language_setting, load_setting, save_setting
+
+# Ordem dos idiomas no seletor (índice da ComboRow <-> código do idioma)
+_INDEX_TO_LANG = ('auto', 'en', 'pt', 'ru', 'zh')
+_LANG_TO_INDEX = {code: index for index, code in enumerate(_INDEX_TO_LANG)}
+
+# Ícone do cabeçalho da página Sobre, resolvido uma vez por processo
+_APP_ICON = Gio.ThemedIcon.new("package-x-generic")
+
+# CSS do cabeçalho da página Sobre
+_CSS = """
+.about-app-name {
+    font-size: x-large;
+    font-weight: bold;
+}
+.about-app-version {
+    font-size: small;
+}
+"""
+
+# Provedor de CSS da janela de configurações
+_css_provider = None
+
+def _install_css():
+    """Registra o CSS da janela de configurações (uma vez por processo)"""
+    global _css_provider
+    if _css_provider is not None:
+        return
+    
+    _css_provider = Gtk.CssProvider()
+    _css_provider.load_from_data(_CSS, -1)
+    Gtk.StyleContext.add_provider_for_display(
+        Gdk.Display.get_default(),
+        _css_provider,
+        Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+    )
+
+# Janela de configurações reutilizada entre aberturas (criada sob demanda)
+_settings_window = None
 
 class SettingsWindow(Adw.PreferencesWindow):
     """Janela de configurações do aplicativo"""
     
+    # Textos fixos da página Sobre (não dependem do idioma)
+    APP_NAME = "Installium"
+    APP_VERSION = "v1.0.0"
+    SUPPORTED_FORMATS = "Debian (.deb), Arch (.pkg.tar.xz/.pkg.tar.zst), Fedora (.rpm), Alpine (.apk)"
+    DEVELOPER = "Esther (SterTheStar)"
+    GITHUB_URL = "https://github.com/SterTheStar/Installium"
+    LICENSE = "GPL v3.0"
+    
+    @classmethod
+    def get_or_create(cls, parent_window):
+        """Retorna a janela de configurações, construindo-a apenas na primeira abertura"""
+        global _settings_window
+        if _settings_window is None:
+            _settings_window = cls(parent_window)
+        elif _settings_window.parent_window is not parent_window:
+            _settings_window._set_parent(parent_window)
+        return _settings_window
+    
     def __init__(self, parent_window):
         super().__init__()
         
-        self.parent_window = parent_window
         self.translator = get_translator()
+        self._set_parent(parent_window)
         
         # Configurações da janela
         self.set_title(_("settings"))
         self.set_default_size(600, 500)
-        self.set_transient_for(parent_window)
         self.set_modal(True)
+        # Fechar apenas oculta a janela, para reutilizá-la na próxima abertura
+        self.set_hide_on_close(True)
         
         # Armazenar referências para elementos que precisam ser atualizados
         self.language_page = None
         self.about_page = None
         self.language_group = None
         self.language_row = None
+        self.install_group = None
+        self.packagekit_row = None
         self.app_info_group = None
         self.tech_info_group = None
         self.app_description = None
@@ -37,54 +96,49 @@ class SettingsWindow(Adw.PreferencesWindow):
         
         # Construir interface
         self._build_ui()
+        self._last_language = self.translator.current_language
+    
+    def _set_parent(self, parent_window):
+        """Associa a janela principal e resolve uma vez os callbacks opcionais dela"""
+        self.parent_window = parent_window
+        self.set_transient_for(parent_window)
+        self._parent_update = getattr(parent_window, '_update_translations', None)
+        self._parent_toast = getattr(parent_window, 'add_toast', None)
+        self._parent_packagekit = getattr(parent_window, 'set_use_packagekit', None)
     
     def _build_ui(self):
         """Constrói a interface da janela de configurações"""
+        tr = self.translator.get
         
         # Página de Idioma
         self.language_page = Adw.PreferencesPage()
-        self.language_page.set_title(_("language"))
+        self.language_page.set_title(tr("language"))
         self.language_page.set_icon_name("preferences-desktop-locale-symbolic")
         
         # Grupo de seleção de idioma
         self.language_group = Adw.PreferencesGroup()
-        self.language_group.set_title(_("language_selection"))
-        self.language_group.set_description(_("language_selection_description"))
+        self.language_group.set_title(tr("language_selection"))
+        self.language_group.set_description(tr("language_selection_description"))
         
         # Row para seleção de idioma
         self.language_row = Adw.ComboRow()
-        self.language_row.set_title(_("interface_language"))
-        self.language_row.set_subtitle(_("language_restart_note"))
+        self.language_row.set_title(tr("interface_language"))
+        self.language_row.set_subtitle(tr("language_restart_note"))
         
-        # Criar modelo de idiomas
-        language_model = Gtk.StringList()
-        languages = [
-            _("automatic"),
+        # Criar modelo de idiomas (construído de uma vez, sem um append por item)
+        language_model = Gtk.StringList.new([
+            tr("automatic"),
             "English",
             "Português",
             "Русский",
             "中文"
-        ]
-        
-        for lang in languages:
-            language_model.append(lang)
+        ])
         
         self.language_row.set_model(language_model)
         
         # Definir seleção atual
-        current_lang = self.translator.current_language
-        if current_lang == 'auto':
-            self.language_row.set_selected(0)
-        elif current_lang == 'en':
-            self.language_row.set_selected(1)
-        elif current_lang == 'pt':
-            self.language_row.set_selected(2)
-        elif current_lang == 'ru':
-            self.language_row.set_selected(3)
-        elif current_lang == 'zh':
-            self.language_row.set_selected(4)
-        else:
-            self.language_row.set_selected(0)  # Default to automatic
+        # Idiomas desconhecidos caem em "automático"
+        self.language_row.set_selected(_LANG_TO_INDEX.get(self.translator.current_language, 0))
         
         # Conectar sinal de mudança
         self.language_row.connect("notify::selected", self._on_language_changed)
@@ -92,14 +146,49 @@ class SettingsWindow(Adw.PreferencesWindow):
         self.language_group.add(self.language_row)
         self.language_page.add(self.language_group)
         
+        # Grupo de instalação: backend PackageKit (opcional, desligado por padrão)
+        self.install_group = Adw.PreferencesGroup()
+        self.install_group.set_title(tr("installation_settings"))
+        
+        self.packagekit_row = Adw.ActionRow()
+        self.packagekit_row.set_title(tr("use_packagekit"))
+        self.packagekit_row.set_subtitle(tr("use_packagekit_description"))
+        
+        packagekit_switch = Gtk.Switch()
+        packagekit_switch.set_valign(Gtk.Align.CENTER)
+        packagekit_switch.set_active(load_setting('installer_backend') == 'packagekit')
+        packagekit_switch.connect("notify::active", self._on_packagekit_toggled)
+        self.packagekit_row.add_suffix(packagekit_switch)
+        self.packagekit_row.set_activatable_widget(packagekit_switch)
+        
+        self.install_group.add(self.packagekit_row)
+        self.language_page.add(self.install_group)
+        
         # Página Sobre
         self.about_page = Adw.PreferencesPage()
-        self.about_page.set_title(_("about"))
+        self.about_page.set_title(tr("about"))
         self.about_page.set_icon_name("help-about-symbolic")
         
+        # Conteúdo construído só quando a página for exibida pela primeira vez
+        self.connect("notify::visible-page", self._on_visible_page_changed)
+        
+        # Adicionar páginas à janela
+        self.add(self.language_page)
+        self.add(self.about_page)
+    
+    def _on_visible_page_changed(self, window, param):
+        """Constrói a página Sobre na primeira vez que ela é aberta"""
+        if self.app_info_group is None and self.get_visible_page() is self.about_page:
+            self._build_about_page()
+    
+    def _build_about_page(self):
+        """Constrói o conteúdo da página Sobre"""
+        _install_css()
+        tr = self.translator.get
+        
         # Grupo de informações do aplicativo
         self.app_info_group = Adw.PreferencesGroup()
-        self.app_info_group.set_title(_("application_info"))
+        self.app_info_group.set_title(tr("application_info"))
         
         # Logo e nome do aplicativo
         app_header = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
@@ -109,24 +198,24 @@ class SettingsWindow(Adw.PreferencesWindow):
         
         # Ícone do aplicativo
         app_icon = Gtk.Image()
-        app_icon.set_from_icon_name("package-x-generic")
+        app_icon.set_from_gicon(_APP_ICON)
         app_icon.set_pixel_size(64)
         app_header.append(app_icon)
         
-        # Nome do aplicativo
-        app_name = Gtk.Label()
-        app_name.set_markup("<span size='x-large' weight='bold'>Installium</span>")
+        # Nome do aplicativo (classes .about-* definidas em _CSS, acima)
+        app_name = Gtk.Label(label=self.APP_NAME)
+        app_name.add_css_class("about-app-name")
         app_header.append(app_name)
         
         # Versão
-        app_version = Gtk.Label()
-        app_version.set_markup("<span size='small'>v1.0.0</span>")
+        app_version = Gtk.Label(label=self.APP_VERSION)
+        app_version.add_css_class("about-app-version")
         app_version.add_css_class("dim-label")
         app_header.append(app_version)
         
         # Descrição
         self.app_description = Gtk.Label()
-        self.app_description.set_text(_("app_description"))
+        self.app_description.set_text(tr("app_description"))
         self.app_description.set_wrap(True)
         self.app_description.set_justify(Gtk.Justification.CENTER)
         self.app_description.set_margin_top(10)
@@ -137,83 +226,93 @@ class SettingsWindow(Adw.PreferencesWindow):
         
         # Informações técnicas
         self.tech_info_group = Adw.PreferencesGroup()
-        self.tech_info_group.set_title(_("technical_info"))
+        self.tech_info_group.set_title(tr("technical_info"))
         
         # Suporte a formatos
         self.formats_row = Adw.ActionRow()
-        self.formats_row.set_title(_("supported_formats"))
-        self.formats_row.set_subtitle("Debian (.deb), Arch (.pkg.tar.xz/.pkg.tar.zst), Fedora (.rpm), Alpine (.apk)")
+        self.formats_row.set_title(tr("supported_formats"))
+        self.formats_row.set_subtitle(self.SUPPORTED_FORMATS)
         self.formats_row.set_icon_name("application-x-archive-symbolic")
         self.tech_info_group.add(self.formats_row)
         
         # Desenvolvedor
         self.developer_row = Adw.ActionRow()
-        self.developer_row.set_title(_("developer"))
-        self.developer_row.set_subtitle("Esther (SterTheStar)")
+        self.developer_row.set_title(tr("developer"))
+        self.developer_row.set_subtitle(self.DEVELOPER)
         self.developer_row.set_icon_name("avatar-default-symbolic")
         self.tech_info_group.add(self.developer_row)
         
         # GitHub
         self.github_row = Adw.ActionRow()
         self.github_row.set_title("GitHub")
-        self.github_row.set_subtitle("https://github.com/SterTheStar/Installium")
+        self.github_row.set_subtitle(self.GITHUB_URL)
         self.github_row.set_icon_name("web-browser-symbolic")
         self.tech_info_group.add(self.github_row)
         
         # Licença
         self.license_row = Adw.ActionRow()
-        self.license_row.set_title(_("license"))
-        self.license_row.set_subtitle("GPL v3.0")
+        self.license_row.set_title(tr("license"))
+        self.license_row.set_subtitle(self.LICENSE)
         self.license_row.set_icon_name("text-x-copying-symbolic")
         self.tech_info_group.add(self.license_row)
         
         self.about_page.add(self.app_info_group)
         self.about_page.add(self.tech_info_group)
-        
-        # Adicionar páginas à janela
-        self.add(self.language_page)
-        self.add(self.about_page)
     
     def _update_translations(self):
         """Atualiza todas as traduções da interface"""
+        # Nada a fazer se o idioma não mudou desde a última atualização
+        language = self.translator.current_language
+        if language == self._last_language:
+            return
+        self._last_language = language
+        
+        tr = self.translator.get
+        
         # Atualizar título da janela
-        self.set_title(_("settings"))
+        self.set_title(tr("settings"))
         
         # Atualizar páginas
         if self.language_page:
-            self.language_page.set_title(_("language"))
+            self.language_page.set_title(tr("language"))
         if self.about_page:
-            self.about_page.set_title(_("about"))
+            self.about_page.set_title(tr("about"))
         
         # Atualizar grupos
         if self.language_group:
-            self.language_group.set_title(_("language_selection"))
-            self.language_group.set_description(_("language_selection_description"))
+            self.language_group.set_title(tr("language_selection"))
+            self.language_group.set_description(tr("language_selection_description"))
         
         if self.app_info_group:
-            self.app_info_group.set_title(_("application_info"))
+            self.app_info_group.set_title(tr("application_info"))
         
         if self.tech_info_group:
-            self.tech_info_group.set_title(_("technical_info"))
+            self.tech_info_group.set_title(tr("technical_info"))
         
         # Atualizar language row (sem recriar o modelo para evitar conflitos)
         if self.language_row:
-            self.language_row.set_title(_("interface_language"))
-            self.language_row.set_subtitle(_("language_restart_note"))
+            self.language_row.set_title(tr("interface_language"))
+            self.language_row.set_subtitle(tr("language_restart_note"))
+        
+        if self.install_group:
+            self.install_group.set_title(tr("installation_settings"))
+        if self.packagekit_row:
+            self.packagekit_row.set_title(tr("use_packagekit"))
+            self.packagekit_row.set_subtitle(tr("use_packagekit_description"))
         
         # Atualizar descrição do app
         if self.app_description:
-            self.app_description.set_text(_("app_description"))
+            self.app_description.set_text(tr("app_description"))
         
         # Atualizar rows de informações técnicas
         if self.formats_row:
-            self.formats_row.set_title(_("supported_formats"))
+            self.formats_row.set_title(tr("supported_formats"))
         
         if self.developer_row:
-            self.developer_row.set_title(_("developer"))
+            self.developer_row.set_title(tr("developer"))
         
         if self.license_row:
-            self.license_row.set_title(_("license"))
+            self.license_row.set_title(tr("license"))
     
     def _update_translations_safe(self):
         """Versão segura da atualização de traduções"""
@@ -227,11 +326,8 @@ class SettingsWindow(Adw.PreferencesWindow):
         """Callback para mudança de idioma"""
         selected = combo_row.get_selected()
         
-        # Mapear seleção para código de idioma
-        language_codes = ['auto', 'en', 'pt', 'ru', 'zh']
-        
-        if selected < len(language_codes):
-            new_language = language_codes[selected]
+        if selected < len(_INDEX_TO_LANG):
+            new_language = _INDEX_TO_LANG[selected]
             
             # Evitar loop infinito - verificar se realmente mudou
             current_lang = self.translator.current_language
@@ -249,26 +345,30 @@ class SettingsWindow(Adw.PreferencesWindow):
                 self.translator.set_language(new_language)
             
             # Usar GLib.idle_add para atualizar a interface de forma segura
-            GLib.idle_add(self._update_translations_safe)
-            
-            # Atualizar interface da janela principal
-            if hasattr(self.parent_window, '_update_translations'):
-                GLib.idle_add(self.parent_window._update_translations)
-            
-            # Mostrar toast de confirmação
-            GLib.idle_add(self._show_language_changed_toast)
+            GLib.idle_add(self._apply_language_change)
+    
+    def _apply_language_change(self):
+        """Atualiza as janelas e confirma a troca de idioma em uma única iteração do loop"""
+        self._update_translations_safe()
+        
+        # Atualizar interface da janela principal
+        if self._parent_update:
+            self._parent_update()
+        
+        # Mostrar toast de confirmação
+        self._show_language_changed_toast()
+        return False  # Remove from idle queue
+    
+    def _on_packagekit_toggled(self, switch, param):
+        """Salva a escolha do backend de instalação e a aplica à janela principal"""
+        enabled = switch.get_active()
+        save_setting('installer_backend', 'packagekit' if enabled else 'native')
+        if self._parent_packagekit:
+            self._parent_packagekit(enabled)
     
     def _save_language_setting(self, language_code):
-        """Salva a configuração de idioma (implementação básica)"""
-        try:
-            config_dir = os.path.expanduser("~/.config/installium")
-            os.makedirs(config_dir, exist_ok=True)
-            
-            config_file = os.path.join(config_dir, "settings.conf")
-            with open(config_file, 'w') as f:
-                f.write(f"language={language_code}\n")
-        except Exception as e:
-            print(f"Error saving language setting: {e}")
+        """Salva a configuração de idioma"""
+        save_setting('language', language_code)
     
     def _show_language_changed_toast(self):
         """Mostra toast de confirmação de mudança de idioma"""
@@ -277,20 +377,10 @@ class SettingsWindow(Adw.PreferencesWindow):
         toast.set_timeout(3)
         
         # Adicionar toast à janela principal se possível
-        if hasattr(self.parent_window, 'add_toast'):
-            self.parent_window.add_toast(toast)
+        if self._parent_toast:
+            self._parent_toast(toast)
     
     @staticmethod
     def load_language_setting():
         """Carrega a configuração de idioma salva"""
-        try:
-            config_file = os.path.expanduser("~/.config/installium/settings.conf")
-            if os.path.exists(config_file):
-                with open(config_file, 'r') as f:
-                    for line in f:
-                        if line.startswith('language='):
-                            return line.split('=', 1)[1].strip()
-        except Exception as e:
-            print(f"Error loading language setting: {e}")
-        
-        return 'auto'  # Default
\ No newline at end of file
+        return load_language_setting()
@@ -6,18 +6,90 @@ Suporta múltiplos idiomas através de arquivos JSON
 import json
 import os
 import locale
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
+
+# orjson (opcional) decodifica os arquivos de tradução mais rápido que o json padrão;
+# seu JSONDecodeError herda de json.JSONDecodeError
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Mapear códigos de idioma do sistema para arquivos disponíveis
+_LANGUAGE_MAP = {
+    'pt': 'pt',  # Português
+    'en': 'en',  # Inglês
+    'zh': 'zh',  # Chinês
+    'ru': 'ru',  # Russo
+    'es': 'pt',  # Espanhol -> Português (similar)
+    'fr': 'en',  # Francês -> Inglês
+    'de': 'en',  # Alemão -> Inglês
+    'it': 'en',  # Italiano -> Inglês
+    'ja': 'zh',  # Japonês -> Chinês (caracteres similares)
+    'ko': 'zh',  # Coreano -> Chinês
+}
+
+def _locale_default_language() -> Optional[str]:
+    """1. Idioma de locale.getdefaultlocale()"""
+    try:
+        return locale.getdefaultlocale()[0]
+    except Exception:
+        return None
+
+def _env_language() -> Optional[str]:
+    """2. Idioma das variáveis de ambiente"""
+    for env_var in ('LANG', 'LANGUAGE', 'LC_ALL', 'LC_MESSAGES'):
+        env_value = os.environ.get(env_var)
+        if env_value:
+            return env_value
+    return None
+
+def _locale_current_language() -> Optional[str]:
+    """3. Idioma de locale.getlocale()"""
+    try:
+        return locale.getlocale()[0]
+    except Exception:
+        return None
+
+# Nomes exibidos dos idiomas com tradução
+_LANGUAGE_NAMES = {
+    'en': 'English',
+    'pt': 'Português',
+    'zh': '中文',
+    'ru': 'Русский'
+}
+
+@lru_cache(maxsize=4)
+def _compute_available_languages(translations_dir: str, signature: int) -> Dict[str, str]:
+    """Idiomas com arquivo de tradução no diretório (memorizado pela assinatura do diretório)"""
+    available = {}
+    for code, name in _LANGUAGE_NAMES.items():
+        if os.path.exists(os.path.join(translations_dir, f"{code}.json")):
+            available[code] = name
+    return available
+
+# Fontes consultadas para detectar o idioma do sistema, em ordem de prioridade
+_LANGUAGE_PROBES = (_locale_default_language, _env_language, _locale_current_language)
 
 class Translator:
     """Classe para gerenciar traduções"""
     
+    # Arquivos de tradução já lidos (código -> traduções); são somente leitura em tempo de execução
+    _file_cache: Dict[str, Dict[str, str]] = {}
+    
     def __init__(self):
         self.translations: Dict[str, str] = {}
         self.current_language = 'en'
         
+        # Textos já resolvidos (sem formatação) e chaves sabidamente ausentes do idioma atual
+        self._cache: Dict[str, str] = {}
+        self._missing: Set[str] = set()
+        
         # Detectar diretório de traduções (compatível com PyInstaller)
         self.translations_dir = self._get_translations_dir()
+        self._translations_path = str(self.translations_dir)
         
         # Detectar idioma do sistema
         self._detect_system_language()
@@ -49,58 +121,18 @@ class Translator:
     def _detect_system_language(self):
         """Detecta o idioma do sistema automaticamente"""
         try:
-            # Tentar múltiplas fontes para detectar o idioma
+            # Tentar as fontes em ordem, parando na primeira que responder
             detected_lang = None
+            for probe in _LANGUAGE_PROBES:
+                value = probe()
+                if value:
+                    detected_lang = value[:2].lower()
+                    break
             
-            # 1. Tentar locale.getdefaultlocale()
-            try:
-                system_locale = locale.getdefaultlocale()[0]
-                if system_locale:
-                    detected_lang = system_locale[:2].lower()
-            except:
-                pass
-            
-            # 2. Tentar variáveis de ambiente se o primeiro método falhar
-            if not detected_lang:
-                import os
-                for env_var in ['LANG', 'LANGUAGE', 'LC_ALL', 'LC_MESSAGES']:
-                    env_value = os.environ.get(env_var)
-                    if env_value:
-                        detected_lang = env_value[:2].lower()
-                        break
-            
-            # 3. Tentar locale.getlocale()
-            if not detected_lang:
-                try:
-                    loc = locale.getlocale()
-                    if loc[0]:
-                        detected_lang = loc[0][:2].lower()
-                except:
-                    pass
-            
-            # Mapear códigos de idioma para arquivos disponíveis
-            language_map = {
-                'pt': 'pt',  # Português
-                'en': 'en',  # Inglês
-                'zh': 'zh',  # Chinês
-                'ru': 'ru',  # Russo
-                'es': 'pt',  # Espanhol -> Português (similar)
-                'fr': 'en',  # Francês -> Inglês
-                'de': 'en',  # Alemão -> Inglês
-                'it': 'en',  # Italiano -> Inglês
-                'ja': 'zh',  # Japonês -> Chinês (caracteres similares)
-                'ko': 'zh',  # Coreano -> Chinês
-            }
-            
-            if detected_lang and detected_lang in language_map:
-                # Verificar se o arquivo de tradução existe
-                candidate_lang = language_map[detected_lang]
-                translation_file = self.translations_dir / f"{candidate_lang}.json"
-                
-                if translation_file.exists():
-                    self.current_language = candidate_lang
-                else:
-                    self.current_language = 'en'  # Fallback para inglês
+            # Verificar se o arquivo de tradução do idioma mapeado existe
+            candidate_lang = _LANGUAGE_MAP.get(detected_lang)
+            if candidate_lang and os.path.exists(os.path.join(self._translations_path, f"{candidate_lang}.json")):
+                self.current_language = candidate_lang
             else:
                 self.current_language = 'en'  # Fallback para inglês
                 
@@ -119,12 +151,22 @@ class Translator:
         Returns:
             bool: True se carregou com sucesso, False caso contrário
         """
+        cached = Translator._file_cache.get(language_code)
+        if cached is not None:
+            self.translations = cached
+            self._cache.clear()
+            self._missing.clear()
+            self.current_language = language_code
+            return True
+        
         translation_file = self.translations_dir / f"{language_code}.json"
         
         try:
             if translation_file.exists():
-                with open(translation_file, 'r', encoding='utf-8') as f:
-                    self.translations = json.load(f)
+                self.translations = _json_loads(translation_file.read_bytes())
+                Translator._file_cache[language_code] = self.translations
+                self._cache.clear()
+                self._missing.clear()
                 self.current_language = language_code
                 return True
             else:
@@ -151,15 +193,28 @@ class Translator:
         Returns:
             str: Texto traduzido ou a chave se não encontrada
         """
-        text = self.translations.get(key, key)
+        # Caminho rápido: chave sem parâmetros já resolvida
+        if not kwargs:
+            text = self._cache.get(key)
+            if text is None:
+                text = self._cache[key] = self.translations.get(key, key)
+            return text
         
-        # Aplicar formatação se houver parâmetros
-        if kwargs:
-            try:
-                text = text.format(**kwargs)
-            except (KeyError, ValueError):
-                # Se formatação falhar, retornar texto sem formatação
-                pass
+        # Chave ausente: retornada como está, sem tentar formatar
+        if key in self._missing:
+            return key
+        
+        text = self.translations.get(key)
+        if text is None:
+            self._missing.add(key)
+            return key
+        
+        # Aplicar formatação com os parâmetros
+        try:
+            text = text.format(**kwargs)
+        except (KeyError, ValueError):
+            # Se formatação falhar, retornar texto sem formatação
+            pass
         
         return text
     
@@ -182,20 +237,13 @@ class Translator:
         Returns:
             Dict[str, str]: Mapeamento código -> nome do idioma
         """
-        languages = {
-            'en': 'English',
-            'pt': 'Português',
-            'zh': '中文',
-            'ru': 'Русский'
-        }
-        
-        available = {}
-        for code, name in languages.items():
-            translation_file = self.translations_dir / f"{code}.json"
-            if translation_file.exists():
-                available[code] = name
+        try:
+            # O mtime do diretório muda quando arquivos de tradução são adicionados/removidos
+            signature = os.stat(self._translations_path).st_mtime_ns
+        except OSError:
+            signature = -1
         
-        return available
+        return dict(_compute_available_languages(self._translations_path, signature))
     
     def get_current_language(self) -> str:
         """Retorna o código do idioma atual"""